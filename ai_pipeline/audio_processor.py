@@ -3,6 +3,8 @@ Audio processing module for transcription.
 """
 import io
 import tempfile
+from functools import lru_cache
+import numpy as np
 from .config import AIConfig
 
 
@@ -93,10 +95,67 @@ def transcribe_with_local_whisper(audio_bytes):
         os.unlink(temp_audio_path)
 
 
+def transcribe_segments(pcm):
+    """
+    Transcribe decoded audio into timed segments.
+
+    Args:
+        pcm: Mono float32 PCM at voice_embedding.SAMPLE_RATE
+
+    Returns:
+        List of dicts: [{'start': 0.0, 'end': 2.5, 'text': '...'}], times in seconds
+    """
+    try:
+        if AIConfig.USE_OPENAI:
+            return transcribe_segments_with_openai(pcm)
+        else:
+            return transcribe_segments_with_local_whisper(pcm)
+    except Exception as e:
+        print(f"Transcription error: {e}")
+        return []
+
+
+def transcribe_segments_with_openai(pcm):
+    """Timed transcription via the OpenAI Whisper API (verbose_json)"""
+    from openai import OpenAI
+    from .voice_embedding import encode_wav
+
+    client = OpenAI(api_key=AIConfig.OPENAI_API_KEY)
+
+    transcription = client.audio.transcriptions.create(
+        model=AIConfig.TRANSCRIPTION_MODEL,
+        file=('chunk.wav', encode_wav(pcm)),
+        response_format='verbose_json',
+        timestamp_granularities=['segment'],
+    )
+    return [
+        {'start': segment.start, 'end': segment.end, 'text': segment.text}
+        for segment in transcription.segments or []
+    ]
+
+
+def transcribe_segments_with_local_whisper(pcm):
+    """Timed transcription with faster-whisper, which accepts PCM directly"""
+    segments, info = _local_whisper_model().transcribe(np.asarray(pcm, dtype=np.float32))
+    return [
+        {'start': segment.start, 'end': segment.end, 'text': segment.text}
+        for segment in segments
+    ]
+
+
+@lru_cache(maxsize=1)
+def _local_whisper_model():
+    from faster_whisper import WhisperModel
+    return WhisperModel(AIConfig.TRANSCRIPTION_MODEL, device="cpu", compute_type="int8")
+
+
 def perform_speaker_diarization(audio_bytes):
     """
     Identify who said what in the audio.
-    This is a placeholder for future implementation using pyannote.audio or similar.
+    Speech regions are found by energy, embedded with the voice backend and
+    clustered into speakers, then matched to the transcript segments by time.
+    Live calls use diarization.diarize_chunk instead, which keeps speakers
+    consistent across chunks and matches them to voice signatures.
 
     Args:
         audio_bytes: Audio data in bytes
@@ -104,6 +163,16 @@ def perform_speaker_diarization(audio_bytes):
     Returns:
         List of dicts with speaker segments: [{'speaker': 'SPEAKER_01', 'start': 0.0, 'end': 5.0, 'text': '...'}]
     """
-    # Placeholder
-    # TODO: Implement speaker diarization
-    return []
+    from .diarization import assign_speakers, diarize
+    from .voice_embedding import decode_audio
+
+    try:
+        pcm = decode_audio(audio_bytes)
+        segments = assign_speakers(transcribe_segments(pcm), diarize(pcm))
+        return [
+            {'speaker': segment['speaker'], 'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+            for segment in segments
+        ]
+    except Exception as e:
+        print(f"Diarization error: {e}")
+        return []
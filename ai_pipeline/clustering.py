@@ -0,0 +1,126 @@
+"""
+Online leader clustering of embeddings.
+
+Each embedding joins the nearest existing cluster if it lies within the cosine
+radius of that cluster's centroid, otherwise it starts a new cluster. Centroids
+are running means of the L2-normalised members, so no member history is kept.
+
+CallClusters keeps one clusterer per call in Redis, with free-form metadata per
+cluster, so every worker process sees the same clusters.
+"""
+import secrets
+from contextlib import contextmanager
+import numpy as np
+from .redis_client import get_redis
+from .signature_cache import normalize_rows
+
+
+class LeaderClusterer:
+    """Leader clustering with running centroids and stable short cluster ids"""
+
+    def __init__(self, radius, dimensions, ids=None, centroids=None, counts=None):
+        self.radius = radius
+        self.dimensions = dimensions
+        self.ids = list(ids or [])
+        self.centroids = (
+            np.array(centroids, dtype=np.float32).reshape(len(self.ids), dimensions)
+            if self.ids else np.empty((0, dimensions), dtype=np.float32)
+        )
+        self.counts = np.array(counts if counts is not None else [], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def assign(self, embedding):
+        """
+        Add an embedding to its cluster.
+
+        Returns:
+            Tuple of (cluster_id, created) where created is True for a new cluster
+        """
+        vector = normalize_rows(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        if len(self):
+            similarities = normalize_rows(self.centroids) @ vector
+            best = int(similarities.argmax())
+            if 1 - similarities[best] <= self.radius:
+                self.counts[best] += 1
+                self.centroids[best] += (vector - self.centroids[best]) / self.counts[best]
+                return self.ids[best], False
+
+        cluster_id = secrets.token_hex(4)
+        self.ids.append(cluster_id)
+        self.centroids = np.vstack([self.centroids, vector])
+        self.counts = np.append(self.counts, 1)
+        return cluster_id, True
+
+    def centroid(self, cluster_id):
+        """Return the normalised centroid of a cluster, or None if unknown"""
+        if cluster_id not in self.ids:
+            return None
+        return normalize_rows(self.centroids[[self.ids.index(cluster_id)]])[0]
+
+    def remove(self, cluster_id):
+        if cluster_id in self.ids:
+            index = self.ids.index(cluster_id)
+            del self.ids[index]
+            self.centroids = np.delete(self.centroids, index, axis=0)
+            self.counts = np.delete(self.counts, index)
+
+    def to_state(self):
+        return {
+            'ids': self.ids,
+            'centroids': self.centroids,
+            'counts': self.counts,
+        }
+
+    @classmethod
+    def from_state(cls, state, radius, dimensions):
+        return cls(radius, dimensions, state['ids'], state['centroids'], state['counts'])
+
+
+class CallClusters:
+    """Per-call LeaderClusterer and per-cluster metadata stored in Redis"""
+
+    def __init__(self, key_prefix, radius, dimensions, ttl):
+        self.key_prefix = key_prefix
+        self.radius = radius
+        self.dimensions = dimensions
+        self.ttl = ttl
+
+    def _key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    def load(self, user_id):
+        """Return (clusterer, metadata by cluster id) for a call"""
+        from celery_app.serialization import loads
+
+        payload = get_redis().get(self._key(user_id))
+        if payload is None:
+            return LeaderClusterer(self.radius, self.dimensions), {}
+        state = loads(payload)
+        return LeaderClusterer.from_state(state['clusters'], self.radius, self.dimensions), state['meta']
+
+    def save(self, user_id, clusterer, meta):
+        from celery_app.serialization import dumps
+
+        get_redis().set(
+            self._key(user_id),
+            dumps({'clusters': clusterer.to_state(), 'meta': meta}),
+            ex=self.ttl,
+        )
+
+    @contextmanager
+    def update(self, user_id):
+        """
+        Load the call's clusters under a lock and save them on exit.
+        Every chunk of the call waits for this lock, so keep the block to
+        in-memory work; match or query outside of it.
+        """
+        with get_redis().lock(f'{self._key(user_id)}:lock', timeout=5, blocking_timeout=5):
+            clusterer, meta = self.load(user_id)
+            yield clusterer, meta
+            self.save(user_id, clusterer, meta)
+
+    def reset(self, user_id):
+        get_redis().delete(self._key(user_id))
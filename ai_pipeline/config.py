@@ -32,8 +32,26 @@ class AIConfig:
         LLM_MODEL = 'llama2'  # Or other local model
         LLM_TEMPERATURE = 0.3
 
+    # Token budget for the transcript in the note extraction prompt
+    NOTE_TRANSCRIPT_MAX_TOKENS = 6000
+
     # Face matching threshold (cosine similarity)
     FACE_MATCH_THRESHOLD = 0.6
 
+    # Cosine distance within which unmatched faces count as the same person
+    FACE_CLUSTER_RADIUS = 0.18
+
+    # Best-quality embeddings kept per unknown face for enrollment
+    FACE_ENROLL_EXEMPLARS = 3
+
+    # Signatures more similar than this to an existing one add nothing
+    FACE_SIGNATURE_DUPLICATE_SIMILARITY = 0.95
+
     # Voice matching threshold
     VOICE_MATCH_THRESHOLD = 0.7
+
+    # Cosine distance within which speech segments count as the same speaker
+    VOICE_CLUSTER_RADIUS = 0.3
+
+    # Speech segments heard from a speaker before matching them to a contact
+    VOICE_CLUSTER_MATCH_SEGMENTS = 3
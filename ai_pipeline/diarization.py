@@ -0,0 +1,247 @@
+"""
+Streaming speaker diarization.
+
+Each audio chunk of a call goes through three cheap steps:
+
+    1. Energy-based voice activity detection splits it into speech regions;
+       silence is never embedded.
+    2. The speech regions are embedded in one batch and assigned online to
+       the call's speaker clusters (leader clustering, cosine radius
+       AIConfig.VOICE_CLUSTER_RADIUS). Cluster state lives in Redis so any
+       worker can process the next chunk.
+    3. Once a cluster has heard VOICE_CLUSTER_MATCH_SEGMENTS regions, its
+       centroid is matched against the user's VoiceSignatures, once. Later
+       chunks reuse the result instead of matching per chunk.
+
+The speaker segments are then attached to the transcript segments by time
+overlap and appended to the call transcript, so note extraction receives
+already attributed statements.
+"""
+import numpy as np
+from django.conf import settings
+from .clustering import CallClusters, LeaderClusterer
+from .config import AIConfig
+from .redis_client import get_redis
+from .voice_embedding import SAMPLE_RATE, embed_segments
+
+# Voice activity detection
+VAD_FRAME_SECONDS = 0.03
+VAD_MARGIN_DB = 12.0  # above the chunk's noise floor
+VAD_MIN_DB = -50.0  # absolute floor, so near-silent chunks stay silent
+MIN_SPEECH_SECONDS = 0.4
+MIN_SILENCE_SECONDS = 0.3
+MAX_SEGMENT_SECONDS = 3.0
+
+_speakers = CallClusters(
+    'diarization',
+    AIConfig.VOICE_CLUSTER_RADIUS,
+    AIConfig.VOICE_EMBEDDING_DIMENSIONS,
+    settings.CALL_STATE_TTL_SECONDS,
+)
+
+
+def detect_speech(pcm, sample_rate=SAMPLE_RATE):
+    """
+    Find speech regions in mono PCM with an adaptive energy threshold.
+
+    Args:
+        pcm: 1-D float32 array in [-1, 1]
+        sample_rate: Sample rate of pcm
+
+    Returns:
+        List of (start, end) tuples in seconds, each at most MAX_SEGMENT_SECONDS
+    """
+    frame = int(VAD_FRAME_SECONDS * sample_rate)
+    count = len(pcm) // frame
+    if count == 0:
+        return []
+
+    frames = np.asarray(pcm[:count * frame], dtype=np.float32).reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    threshold = max(np.percentile(energy_db, 10) + VAD_MARGIN_DB, VAD_MIN_DB)
+    voiced = energy_db > threshold
+
+    # Collect runs of voiced frames, bridging short pauses
+    regions = []
+    for index in np.flatnonzero(voiced):
+        if regions and index - regions[-1][1] <= MIN_SILENCE_SECONDS / VAD_FRAME_SECONDS:
+            regions[-1][1] = index + 1
+        else:
+            regions.append([index, index + 1])
+
+    segments = []
+    for start, end in regions:
+        start, end = start * VAD_FRAME_SECONDS, end * VAD_FRAME_SECONDS
+        if end - start < MIN_SPEECH_SECONDS:
+            continue
+        # Long turns are split so a change of speaker inside them is caught
+        pieces = int(np.ceil((end - start) / MAX_SEGMENT_SECONDS))
+        bounds = np.linspace(start, end, pieces + 1)
+        segments.extend(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+    return segments
+
+
+def _embed_regions(pcm, regions):
+    return embed_segments([pcm[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] for start, end in regions])
+
+
+def diarize_chunk(user_id, pcm, offset=0.0):
+    """
+    Assign the speech in one audio chunk to the call's speakers.
+
+    Args:
+        user_id: ID of the user making the call
+        pcm: Mono float32 PCM of the chunk at SAMPLE_RATE
+        offset: Start time of the chunk in seconds, added to segment times
+
+    Returns:
+        List of dicts: [{'speaker': 'SPEAKER_01', 'relationship_id': 12 or None,
+        'name': 'Ana' or None, 'start': 0.0, 'end': 2.5}]
+    """
+    from .voice_recognition import match_voices
+
+    regions = detect_speech(pcm)
+    if not regions:
+        return []
+    embeddings = _embed_regions(pcm, regions)
+
+    with _speakers.update(user_id) as (clusterer, speakers):
+        cluster_ids = []
+        for embedding in embeddings:
+            cluster_id, created = clusterer.assign(embedding)
+            if created:
+                speakers[cluster_id] = {
+                    'label': f'SPEAKER_{len(speakers) + 1:02d}',
+                    'relationship_id': None,
+                    'name': None,
+                    'matched': False,
+                }
+            cluster_ids.append(cluster_id)
+
+        # Match each speaker once, as soon as we have heard enough of them
+        ready = [
+            cluster_id for cluster_id in set(cluster_ids)
+            if not speakers[cluster_id]['matched']
+            and clusterer.counts[clusterer.ids.index(cluster_id)] >= AIConfig.VOICE_CLUSTER_MATCH_SEGMENTS
+        ]
+        centroids = [clusterer.centroid(cluster_id) for cluster_id in ready]
+        assigned = {cluster_id: speakers[cluster_id] for cluster_id in cluster_ids}
+
+    # Matching may load signatures from the database, so it runs without the
+    # lock; the other chunks of the call only wait for the two short updates
+    if ready:
+        relationships = match_voices(user_id, centroids)
+        with _speakers.update(user_id) as (clusterer, speakers):
+            for cluster_id, relationship in zip(ready, relationships):
+                speaker = speakers.get(cluster_id)
+                # Gone after a reset, or matched by a concurrent chunk
+                if speaker is None or speaker['matched']:
+                    continue
+                speaker['matched'] = True
+                if relationship:
+                    speaker['relationship_id'] = relationship.id
+                    speaker['name'] = relationship.name
+            for cluster_id in assigned.keys() & speakers.keys():
+                assigned[cluster_id] = speakers[cluster_id]
+
+    return [
+        {
+            'speaker': assigned[cluster_id]['label'],
+            'relationship_id': assigned[cluster_id]['relationship_id'],
+            'name': assigned[cluster_id]['name'],
+            'start': offset + start,
+            'end': offset + end,
+        }
+        for cluster_id, (start, end) in zip(cluster_ids, regions)
+    ]
+
+
+def reset_call_speakers(user_id):
+    """Forget the speakers and transcript of the previous call"""
+    _speakers.reset(user_id)
+    reset_call_transcript(user_id)
+
+
+def diarize(pcm):
+    """
+    Diarize a complete recording (no shared state, nothing matched).
+
+    Returns:
+        List of dicts: [{'speaker': 'SPEAKER_01', 'start': 0.0, 'end': 2.5}]
+    """
+    regions = detect_speech(pcm)
+    if not regions:
+        return []
+
+    clusterer = LeaderClusterer(AIConfig.VOICE_CLUSTER_RADIUS, AIConfig.VOICE_EMBEDDING_DIMENSIONS)
+    labels = {}
+    segments = []
+    for embedding, (start, end) in zip(_embed_regions(pcm, regions), regions):
+        cluster_id, _ = clusterer.assign(embedding)
+        labels.setdefault(cluster_id, f'SPEAKER_{len(labels) + 1:02d}')
+        segments.append({'speaker': labels[cluster_id], 'start': start, 'end': end})
+    return segments
+
+
+def assign_speakers(transcript_segments, speaker_segments):
+    """
+    Attach the speaker who talks most during each transcript segment.
+
+    Args:
+        transcript_segments: List of dicts with 'start', 'end' and 'text'
+        speaker_segments: Output of diarize_chunk or diarize
+
+    Returns:
+        The transcript segments, each updated with the speaker fields
+        ('speaker', plus 'relationship_id' and 'name' when known)
+    """
+    for segment in transcript_segments:
+        best, best_overlap = None, 0.0
+        for speaker in speaker_segments:
+            overlap = min(segment['end'], speaker['end']) - max(segment['start'], speaker['start'])
+            if overlap > best_overlap:
+                best, best_overlap = speaker, overlap
+
+        segment['speaker'] = best['speaker'] if best else None
+        segment['relationship_id'] = best.get('relationship_id') if best else None
+        segment['name'] = best.get('name') if best else None
+    return transcript_segments
+
+
+def _transcript_key(user_id):
+    return f'call_transcript:{user_id}'
+
+
+def append_transcript(user_id, segments):
+    """Add attributed transcript segments to the call's running transcript"""
+    from celery_app.serialization import dumps
+
+    if not segments:
+        return
+    key = _transcript_key(user_id)
+    pipeline = get_redis().pipeline()
+    pipeline.rpush(key, *[dumps(segment) for segment in segments])
+    pipeline.expire(key, settings.CALL_STATE_TTL_SECONDS)
+    pipeline.execute()
+
+
+def get_call_transcript(user_id):
+    """Return the call's attributed transcript segments in time order"""
+    from celery_app.serialization import loads
+
+    segments = [loads(item) for item in get_redis().lrange(_transcript_key(user_id), 0, -1)]
+    # Segment times are relative to their chunk, which carries the timestamp
+    return sorted(segments, key=lambda segment: (segment.get('timestamp') or 0, segment['start']))
+
+
+def reset_call_transcript(user_id):
+    get_redis().delete(_transcript_key(user_id))
+
+
+def format_transcript(segments):
+    """Render attributed segments as 'Speaker: text' lines"""
+    return '\n'.join(
+        f"{segment.get('name') or segment.get('speaker') or 'Unknown'}: {segment['text'].strip()}"
+        for segment in segments
+        if segment['text'].strip()
+    )
@@ -0,0 +1,156 @@
+"""
+Per-call clustering of unmatched faces.
+
+Every frame an unknown person appears in yields an embedding that match_face
+cannot place. Clustering them online gives each stranger a stable provisional
+id, so the client is told about them once, and keeps a running centroid that
+becomes their face signature once the user names them.
+
+The clusters double as the pending-face cache: embeddings never leave the
+server. Alongside each centroid we keep the best-quality sighting (largest
+face crop) and a few exemplar embeddings, and the client only ever sees the
+short participant id. State lives in Redis (one key per call, i.e. per user)
+so that every worker process and the API see the same clusters.
+"""
+import numpy as np
+from django.conf import settings
+from .clustering import CallClusters
+from .config import AIConfig
+
+_clusters = CallClusters(
+    'face_clusters',
+    AIConfig.FACE_CLUSTER_RADIUS,
+    AIConfig.FACE_EMBEDDING_DIMENSIONS,
+    settings.FACE_CLUSTER_TTL_SECONDS,
+)
+
+
+def _face_size(location):
+    top, right, bottom, left = location
+    return max(bottom - top, 0) * max(right - left, 0)
+
+
+def _remember_sighting(pending, face, timestamp):
+    """Keep the best crop and the highest-quality exemplar embeddings"""
+    location = [int(value) for value in face['location']]
+    size = _face_size(location)
+
+    if size > pending['size']:
+        pending['size'] = size
+        pending['location'] = location
+        pending['timestamp'] = timestamp
+    pending['sightings'] += 1
+
+    exemplars = list(zip(pending['exemplar_sizes'], pending['exemplars']))
+    exemplars.append((size, np.asarray(face['embedding'], dtype=np.float32)))
+    exemplars.sort(key=lambda exemplar: exemplar[0], reverse=True)
+    exemplars = exemplars[:AIConfig.FACE_ENROLL_EXEMPLARS]
+    pending['exemplar_sizes'] = [exemplar_size for exemplar_size, _ in exemplars]
+    pending['exemplars'] = np.stack([embedding for _, embedding in exemplars])
+
+
+def assign_unknown_faces(user_id, faces):
+    """
+    Assign unmatched faces to the call's clusters.
+
+    Args:
+        user_id: ID of the user making the call
+        faces: List of (face dict, frame timestamp) tuples
+
+    Returns:
+        List of (cluster_id, created) tuples, one per face
+    """
+    if not faces:
+        return []
+
+    with _clusters.update(user_id) as (clusterer, pending_faces):
+        assignments = []
+        for face, timestamp in faces:
+            cluster_id, created = clusterer.assign(face['embedding'])
+            if created:
+                pending_faces[cluster_id] = {
+                    'size': -1,
+                    'sightings': 0,
+                    'exemplar_sizes': [],
+                    'exemplars': np.empty((0, AIConfig.FACE_EMBEDDING_DIMENSIONS), dtype=np.float32),
+                }
+            _remember_sighting(pending_faces[cluster_id], face, timestamp)
+            assignments.append((cluster_id, created))
+
+    return assignments
+
+
+def get_pending_face(user_id, cluster_id):
+    """
+    Look up a provisional participant.
+
+    Returns:
+        Dict with the centroid, exemplar embeddings and best crop metadata
+        (location, timestamp, sightings), or None if unknown or expired
+    """
+    clusterer, pending_faces = _clusters.load(user_id)
+    centroid = clusterer.centroid(cluster_id)
+    if centroid is None:
+        return None
+
+    pending = pending_faces.get(cluster_id, {})
+    return {
+        'centroid': centroid,
+        'exemplars': pending.get('exemplars', []),
+        'location': pending.get('location'),
+        'timestamp': pending.get('timestamp'),
+        'sightings': pending.get('sightings', 0),
+    }
+
+
+def discard_pending_face(user_id, cluster_id):
+    """Forget a provisional participant, e.g. once it has been enrolled"""
+    with _clusters.update(user_id) as (clusterer, pending_faces):
+        clusterer.remove(cluster_id)
+        pending_faces.pop(cluster_id, None)
+
+
+def reset_call_clusters(user_id):
+    """Forget all provisional participants, e.g. when a new call starts"""
+    _clusters.reset(user_id)
+
+
+def signature_embeddings(pending_face):
+    """
+    Embeddings to enroll for a provisional participant: the running centroid,
+    plus any exemplar that adds a noticeably different view of the face.
+    """
+    embeddings = [pending_face['centroid']]
+    for exemplar in pending_face['exemplars']:
+        exemplar = exemplar / max(np.linalg.norm(exemplar), 1e-12)
+        if max(float(exemplar @ embedding) for embedding in embeddings) < AIConfig.FACE_SIGNATURE_DUPLICATE_SIMILARITY:
+            embeddings.append(exemplar)
+    return embeddings
+
+
+def enroll_face_cluster(user_id, cluster_id, relationship):
+    """
+    Turn a provisional participant into face signatures for a relationship.
+    Call inside a transaction; the pending face is discarded once it commits.
+
+    Args:
+        user_id: ID of the user who owns the call
+        cluster_id: Provisional id sent in the new_participant event
+        relationship: Relationship the user named this person as
+
+    Returns:
+        List of FaceSignature objects, or None if the cluster expired
+    """
+    from django.db import transaction
+    from .face_recognition import create_face_signature
+
+    pending_face = get_pending_face(user_id, cluster_id)
+    if pending_face is None:
+        return None
+
+    signatures = [
+        create_face_signature(relationship, embedding)
+        for embedding in signature_embeddings(pending_face)
+    ]
+    transaction.on_commit(lambda: discard_pending_face(user_id, cluster_id))
+    return signatures
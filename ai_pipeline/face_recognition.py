@@ -2,8 +2,8 @@
 Face recognition module for matching faces against stored signatures.
 """
 import numpy as np
-from scipy.spatial.distance import cosine
 from .config import AIConfig
+from .signature_cache import get_signature_matrix, normalize_rows
 
 
 def match_face(user_id, face_embedding):
@@ -17,29 +17,34 @@ def match_face(user_id, face_embedding):
     Returns:
         Relationship object if match found, None otherwise
     """
-    from apps.signatures.models import FaceSignature
-    from apps.relationships.models import Relationship
+    return match_faces(user_id, [face_embedding])[0]
+
 
-    # Get all face signatures for this user's relationships
-    signatures = FaceSignature.objects.filter(
-        relationship__user_id=user_id
-    ).select_related('relationship')
+def match_faces(user_id, face_embeddings):
+    """
+    Match several face embeddings at once against the user's face signatures.
+    All embeddings are scored with a single matrix product against the cached
+    signature matrix, and matched relationships are loaded in one query.
+
+    Args:
+        user_id: ID of the user
+        face_embeddings: Sequence or (n, 128) array of face embeddings
 
-    best_match = None
-    best_similarity = 0
+    Returns:
+        List with a Relationship object (or None) per embedding
+    """
+    from apps.relationships.models import Relationship
 
-    for signature in signatures:
-        # Convert stored embedding to numpy array
-        stored_embedding = np.array(signature.embedding)
+    if len(face_embeddings) == 0:
+        return []
 
-        # Calculate cosine similarity (1 - cosine distance)
-        similarity = 1 - cosine(face_embedding, stored_embedding)
+    matrix = get_signature_matrix(user_id, 'face')
+    matches = matrix.match(np.asarray(face_embeddings), AIConfig.FACE_MATCH_THRESHOLD)
 
-        if similarity > best_similarity and similarity >= AIConfig.FACE_MATCH_THRESHOLD:
-            best_similarity = similarity
-            best_match = signature.relationship
+    relationship_ids = {relationship_id for relationship_id, _ in matches if relationship_id is not None}
+    relationships = Relationship.objects.in_bulk(relationship_ids) if relationship_ids else {}
 
-    return best_match
+    return [relationships.get(relationship_id) for relationship_id, _ in matches]
 
 
 def create_face_signature(relationship, face_embedding, image_path=None):
@@ -80,16 +85,26 @@ def update_face_signature(relationship, new_embedding):
     """
     from apps.signatures.models import FaceSignature
 
-    # Check if we already have a very similar signature
-    existing_signatures = FaceSignature.objects.filter(relationship=relationship)
-
-    for sig in existing_signatures:
-        stored_embedding = np.array(sig.embedding)
-        similarity = 1 - cosine(new_embedding, stored_embedding)
+    # Check if we already have a very similar signature, scoring all stored
+    # embeddings in one pass
+    existing = list(
+        FaceSignature.objects
+        .filter(relationship=relationship)
+        .order_by()
+        .values_list('id', 'embedding')
+    )
+    if existing:
+        stored_embeddings = normalize_rows(
+            np.stack([np.asarray(embedding, dtype=np.float32) for _, embedding in existing])
+        )
+        query = normalize_rows(np.asarray(new_embedding, dtype=np.float32).reshape(1, -1))[0]
+        similarities = stored_embeddings @ query
+        best = int(similarities.argmax())
 
         # If very similar, don't create duplicate
-        if similarity > 0.95:
-            return sig
+        if similarities[best] > AIConfig.FACE_SIGNATURE_DUPLICATE_SIMILARITY:
+            return FaceSignature.objects.get(id=existing[best][0])
 
-    # Create new signature (multiple signatures per person improve accuracy)
+    # Create new signature (multiple signatures per person improve accuracy;
+    # the compact_signatures job keeps their number bounded)
     return create_face_signature(relationship, new_embedding)
@@ -1,7 +1,11 @@
 """
 Note extraction module using LLM to generate structured notes from transcriptions.
 """
+import logging
 from .config import AIConfig
+from .transcript_compaction import compact_transcript
+
+logger = logging.getLogger(__name__)
 
 
 def extract_notes_from_transcription(transcription, relationships):
@@ -101,6 +105,13 @@ def build_note_extraction_prompt(transcription, participant_names):
     """
     participants_str = ", ".join(participant_names)
 
+    # Fillers, noise, overlap repeats and split turns cost tokens but add nothing
+    transcription, stats = compact_transcript(transcription)
+    logger.info(
+        'Note extraction transcript compacted: %d -> %d tokens (ratio %.2f)',
+        stats['tokens_before'], stats['tokens_after'], stats['ratio'],
+    )
+
     prompt = f"""
 You are analyzing a conversation transcript. Extract important, memorable information mentioned by or about each participant.
 
@@ -0,0 +1,15 @@
+"""
+Shared Redis connection for AI pipeline state (signature caches, per-call state).
+"""
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide Redis client (the pool is reset after fork)"""
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
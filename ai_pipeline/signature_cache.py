@@ -0,0 +1,264 @@
+"""
+Vectorised signature matching with a two-level cache.
+
+Each user's face (or voice) signatures are loaded once into a normalised
+matrix (float32, float16 or int8; see quantization), so a batch of embeddings is scored with a single matrix
+product instead of a Python loop over rows.
+
+Cache layers:
+    1. Process-local copy, valid while its version matches Redis
+    2. Memory-mapped file shared by all processes on the node (signature_store)
+    3. Serialized matrix in Redis, shared by all processes and hosts
+    4. The database, read only when every cache misses
+
+Any write to a user's signatures bumps the version (see apps.signatures.signals),
+which invalidates every cached copy in O(1).
+"""
+from collections import OrderedDict
+import secrets
+import numpy as np
+from django.conf import settings
+from .quantization import compress, similarities
+from .redis_client import get_redis
+from .signature_store import get_signature_store
+
+KINDS = ('face', 'voice')
+
+# Most recently used matrices kept in this process
+LOCAL_CACHE_SIZE = 256
+
+_local_cache = OrderedDict()
+
+
+class SignatureMatrix:
+    """
+    L2-normalised signature embeddings with their relationship ids, held in
+    the compact precision set by SIGNATURE_MATCH_PRECISION.
+    """
+
+    def __init__(self, version, relationship_ids, embeddings, dimensions, precision='float32'):
+        self.version = version
+        self.precision = precision
+        self.relationship_ids = np.asarray(relationship_ids, dtype=np.int64)
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(self.relationship_ids), dimensions)
+        self.embeddings, self.scales = compress(normalize_rows(embeddings), precision)
+
+    @classmethod
+    def from_compact(cls, version, relationship_ids, embeddings, scales, precision):
+        """Rebuild a matrix from its already normalised, compressed form"""
+        matrix = cls.__new__(cls)
+        matrix.version = version
+        matrix.precision = precision
+        matrix.relationship_ids = np.asarray(relationship_ids, dtype=np.int64)
+        matrix.embeddings = embeddings
+        matrix.scales = scales
+        return matrix
+
+    def __len__(self):
+        return len(self.relationship_ids)
+
+    @property
+    def nbytes(self):
+        return self.embeddings.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def match(self, queries, threshold):
+        """
+        Find the best matching relationship for each query embedding.
+
+        Args:
+            queries: Array of shape (n, dimensions), or a single embedding
+            threshold: Minimum cosine similarity for a match
+
+        Returns:
+            List of (relationship_id or None, similarity) tuples, one per query
+        """
+        queries = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if not len(self):
+            return [(None, 0.0)] * len(queries)
+
+        scores = similarities(queries, self.embeddings, self.scales)
+        best = scores.argmax(axis=1)
+        best_similarities = scores[np.arange(len(queries)), best]
+
+        return [
+            (int(self.relationship_ids[index]) if similarity >= threshold else None, float(similarity))
+            for index, similarity in zip(best, best_similarities)
+        ]
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _version_key(user_id, kind):
+    return f'signatures:{kind}:{user_id}:version'
+
+
+def _matrix_key(user_id, kind, version):
+    return f'signatures:{kind}:{user_id}:{version}:{settings.SIGNATURE_MATCH_PRECISION}'
+
+
+def _signature_model(kind):
+    from apps.signatures.models import FaceSignature, VoiceSignature
+    return {'face': FaceSignature, 'voice': VoiceSignature}[kind]
+
+
+def _dimensions(kind):
+    from .config import AIConfig
+    return {
+        'face': AIConfig.FACE_EMBEDDING_DIMENSIONS,
+        'voice': AIConfig.VOICE_EMBEDDING_DIMENSIONS,
+    }[kind]
+
+
+def _seed_version(redis, key):
+    # A counter that restarted at 0 after a Redis restart or flush would repeat
+    # versions that store files and process caches still hold; a missing
+    # counter starts from a random point instead, so versions are never reused
+    redis.set(key, secrets.randbits(62), nx=True)
+
+
+def _current_version(user_id, kind):
+    redis = get_redis()
+    key = _version_key(user_id, kind)
+    version = redis.get(key)
+    if version is None:
+        _seed_version(redis, key)
+        version = redis.get(key)
+    return int(version)
+
+
+def _as_array(embedding):
+    # HalfVectorField values are HalfVector objects, VectorField values arrays
+    if hasattr(embedding, 'to_numpy'):
+        embedding = embedding.to_numpy()
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def _build_matrix(user_id, kind, version):
+    """Load all signatures for a user from the database"""
+    precision = settings.SIGNATURE_MATCH_PRECISION
+    # The half-precision column is half the bytes to transfer and parse, and
+    # float16 is as precise as any compact form we match with
+    column = 'embedding' if precision == 'float32' else 'embedding_half'
+    rows = list(
+        _signature_model(kind).objects
+        .filter(relationship__user_id=user_id)
+        .order_by()
+        .values_list('relationship_id', column)
+    )
+    dimensions = _dimensions(kind)
+    relationship_ids = [relationship_id for relationship_id, _ in rows]
+    embeddings = (
+        np.stack([_as_array(embedding) for _, embedding in rows])
+        if rows else np.empty((0, dimensions), dtype=np.float32)
+    )
+    return SignatureMatrix(version, relationship_ids, embeddings, dimensions, precision)
+
+
+def _store_matrix(user_id, kind, matrix):
+    from celery_app.serialization import dumps
+
+    payload = dumps({
+        'relationship_ids': matrix.relationship_ids,
+        'embeddings': matrix.embeddings,
+        'precision': matrix.precision,
+        'scales': matrix.scales,
+    })
+    get_redis().set(
+        _matrix_key(user_id, kind, matrix.version),
+        payload,
+        ex=settings.SIGNATURE_CACHE_TTL_SECONDS,
+    )
+
+
+def _load_matrix(user_id, kind, version):
+    from celery_app.serialization import loads
+
+    payload = get_redis().get(_matrix_key(user_id, kind, version))
+    if payload is None:
+        return None
+    data = loads(payload)
+    return SignatureMatrix.from_compact(
+        version, data['relationship_ids'], data['embeddings'], data['scales'], data['precision']
+    )
+
+
+def _remember(user_id, kind, matrix):
+    _local_cache[(user_id, kind)] = matrix
+    _local_cache.move_to_end((user_id, kind))
+    while len(_local_cache) > LOCAL_CACHE_SIZE:
+        _local_cache.popitem(last=False)
+
+
+def _fetch_matrix(user_id, kind, version):
+    """Read the matrix from Redis, or build and publish it from the database"""
+    matrix = _load_matrix(user_id, kind, version)
+    if matrix is None:
+        matrix = _build_matrix(user_id, kind, version)
+        _store_matrix(user_id, kind, matrix)
+    return matrix
+
+
+def _load_shared(user_id, kind, version, store):
+    """Map the node's copy of the matrix, regenerating it if it is stale"""
+    matrix = store.load(user_id, kind, version)
+    if matrix is not None:
+        return matrix
+
+    with store.writer_lock(user_id, kind):
+        # Another process may have written it while we waited for the lock
+        matrix = store.load(user_id, kind, version)
+        if matrix is None:
+            store.save(user_id, kind, _fetch_matrix(user_id, kind, version))
+            matrix = store.load(user_id, kind, version)
+    return matrix
+
+
+def get_signature_matrix(user_id, kind='face'):
+    """
+    Return the current SignatureMatrix for a user's face or voice signatures.
+    """
+    user_id = int(user_id)
+    version = _current_version(user_id, kind)
+
+    cached = _local_cache.get((user_id, kind))
+    if cached is not None and cached.version == version:
+        _local_cache.move_to_end((user_id, kind))
+        return cached
+
+    store = get_signature_store()
+    if store is not None:
+        matrix = _load_shared(user_id, kind, version, store)
+    else:
+        matrix = _fetch_matrix(user_id, kind, version)
+
+    _remember(user_id, kind, matrix)
+    return matrix
+
+
+def invalidate_signatures(user_id, kind=None):
+    """Bump the signature version so every cached copy is rebuilt on next use"""
+    pipeline = get_redis().pipeline()
+    for cache_kind in ([kind] if kind else KINDS):
+        _seed_version(pipeline, _version_key(user_id, cache_kind))
+        pipeline.incr(_version_key(user_id, cache_kind))
+    pipeline.execute()
+
+
+def warm_signature_cache(user_id, kind='face'):
+    """Build the current matrix and publish it to Redis ahead of the next match"""
+    user_id = int(user_id)
+    version = _current_version(user_id, kind)
+    matrix = _build_matrix(user_id, kind, version)
+    _store_matrix(user_id, kind, matrix)
+
+    store = get_signature_store()
+    if store is not None:
+        with store.writer_lock(user_id, kind):
+            store.save(user_id, kind, matrix)
+        matrix = store.load(user_id, kind, version) or matrix
+
+    _remember(user_id, kind, matrix)
+    return matrix
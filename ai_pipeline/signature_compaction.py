@@ -0,0 +1,112 @@
+"""
+Signature compaction.
+
+Frequently seen contacts accumulate face and voice signatures, and every extra
+row makes matching more expensive without adding much accuracy. Compaction
+clusters each relationship's embeddings (average-linkage agglomerative
+clustering on cosine distance) into at most SIGNATURE_MAX_PER_RELATIONSHIP
+groups and keeps one representative per group: the medoid, weighted by
+confidence_score. Everything else is deleted in bulk.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from scipy.cluster.hierarchy import fcluster, linkage
+from .signature_cache import normalize_rows
+
+
+def select_representatives(embeddings, confidences, max_count):
+    """
+    Pick at most max_count representative embeddings.
+
+    Args:
+        embeddings: Array of shape (n, dimensions)
+        confidences: Confidence score per embedding
+        max_count: Maximum number of representatives to keep
+
+    Returns:
+        Sorted list of indices of the embeddings to keep
+    """
+    embeddings = normalize_rows(np.asarray(embeddings, dtype=np.float64))
+    confidences = np.asarray(confidences, dtype=np.float64)
+    if len(embeddings) <= max_count:
+        return list(range(len(embeddings)))
+
+    labels = fcluster(linkage(embeddings, method='average', metric='cosine'), t=max_count, criterion='maxclust')
+
+    keep = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        # Medoid: the member closest on average to the rest of its cluster,
+        # with confident detections preferred over marginal ones
+        similarities = embeddings[members] @ embeddings[members].T
+        scores = similarities.mean(axis=1) * confidences[members]
+        keep.append(int(members[scores.argmax()]))
+
+    return sorted(keep)
+
+
+def compact_relationship_signatures(model, relationship_id, max_count):
+    """
+    Reduce one relationship's signatures to at most max_count.
+
+    Args:
+        model: FaceSignature or VoiceSignature
+        relationship_id: ID of the relationship to compact
+        max_count: Maximum number of signatures to keep
+
+    Returns:
+        Number of signatures deleted
+    """
+    rows = list(
+        model.objects
+        .filter(relationship_id=relationship_id)
+        .order_by('id')
+        .values_list('id', 'embedding', 'confidence_score')
+    )
+    if len(rows) <= max_count:
+        return 0
+
+    keep = select_representatives(
+        np.stack([np.asarray(embedding, dtype=np.float32) for _, embedding, _ in rows]),
+        [confidence for _, _, confidence in rows],
+        max_count,
+    )
+    keep_ids = {rows[index][0] for index in keep}
+    delete_ids = [signature_id for signature_id, _, _ in rows if signature_id not in keep_ids]
+
+    # post_delete invalidates the user's cached matrix once for the whole
+    # delete, after the transaction commits (see apps.signatures.signals)
+    with transaction.atomic():
+        deleted, _ = model.objects.filter(id__in=delete_ids).delete()
+    return deleted
+
+
+def compact_signatures(max_count=None):
+    """
+    Compact the face and voice signatures of every relationship over the cap.
+
+    Returns:
+        Dict with the number of signatures deleted per kind
+    """
+    from apps.signatures.models import FaceSignature, VoiceSignature
+
+    max_count = max_count or settings.SIGNATURE_MAX_PER_RELATIONSHIP
+    deleted = {}
+
+    for kind, model in (('face', FaceSignature), ('voice', VoiceSignature)):
+        relationship_ids = (
+            model.objects
+            .order_by()
+            .values('relationship_id')
+            .annotate(total=Count('id'))
+            .filter(total__gt=max_count)
+            .values_list('relationship_id', flat=True)
+        )
+        deleted[kind] = sum(
+            compact_relationship_signatures(model, relationship_id, max_count)
+            for relationship_id in relationship_ids
+        )
+
+    return deleted
@@ -0,0 +1,160 @@
+"""
+Memory-mapped per-user signature files shared by all processes on a node.
+
+With prefork workers every process would otherwise hold its own copy of each
+user's signature matrix. Instead, the matrix is written once to a file in
+SIGNATURE_STORE_DIR and every process maps it read-only; numpy arrays are
+views straight onto the page cache, so a node keeps one physical copy no
+matter how many processes match against it.
+
+Each user and kind has two files:
+
+    {user_id}.sig   header, then the normalised embeddings in the matrix
+                    precision (followed by per-row scales for int8)
+    {user_id}.ids   header, then the relationship id of each row (int64)
+
+Both headers carry the signature cache version and the precision. A file
+whose version differs from the current one (versions are never reused, even
+after Redis loses its counters; see signature_cache), or that was written in
+another precision than SIGNATURE_MATCH_PRECISION, is stale: the first process to notice takes an exclusive
+flock and rewrites both files (to temp names, then renamed into place), while
+the others wait on the lock and map the fresh files. Processes that still map
+the old files keep reading them safely until they let go.
+"""
+import fcntl
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+
+MAGIC = b'CRMSIG'
+FORMAT_VERSION = 1
+
+# magic, format version, precision, dimensions, rows, signature cache version
+_HEADER = struct.Struct('<6sBB I I Q')
+HEADER_SIZE = 32
+
+_PRECISION_CODES = {'float32': 0, 'float16': 1, 'int8': 2}
+_PRECISIONS = {code: precision for precision, code in _PRECISION_CODES.items()}
+
+
+class SignatureStore:
+    """Directory of memory-mapped signature matrices"""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        for kind in ('face', 'voice'):
+            os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+
+    def _path(self, user_id, kind, suffix):
+        return os.path.join(self.directory, kind, f'{int(user_id)}.{suffix}')
+
+    def load(self, user_id, kind, version):
+        """
+        Map a user's signature matrix if the stored copy is at this version.
+
+        Returns:
+            SignatureMatrix backed by the mapped file, or None if missing or stale
+        """
+        from .signature_cache import SignatureMatrix
+
+        try:
+            sig_map = _map(self._path(user_id, kind, 'sig'))
+            ids_map = _map(self._path(user_id, kind, 'ids'))
+        except FileNotFoundError:
+            return None
+
+        header = _read_header(sig_map)
+        if header is None or header != _read_header(ids_map) or header[4] != version:
+            return None
+        if header[1] != settings.SIGNATURE_MATCH_PRECISION:
+            return None
+
+        precision, dimensions, rows = header[1], header[2], header[3]
+        dtype = np.dtype(precision)
+        relationship_ids = np.frombuffer(ids_map, dtype=np.int64, count=rows, offset=HEADER_SIZE)
+        embeddings = np.frombuffer(
+            sig_map, dtype=dtype, count=rows * dimensions, offset=HEADER_SIZE
+        ).reshape(rows, dimensions)
+        scales = None
+        if precision == 'int8':
+            scales = np.frombuffer(
+                sig_map, dtype=np.float32, count=rows, offset=HEADER_SIZE + embeddings.nbytes
+            )
+
+        return SignatureMatrix.from_compact(version, relationship_ids, embeddings, scales, precision)
+
+    def save(self, user_id, kind, matrix):
+        """Write a matrix to the store, replacing any older copy atomically"""
+        header = _HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            _PRECISION_CODES[matrix.precision],
+            matrix.embeddings.shape[1],
+            len(matrix),
+            matrix.version,
+        ).ljust(HEADER_SIZE, b'\0')
+
+        # ids first: a reader that sees the new .sig always finds matching ids
+        _write_atomic(self._path(user_id, kind, 'ids'), header, matrix.relationship_ids.astype(np.int64))
+        blocks = [np.ascontiguousarray(matrix.embeddings)]
+        if matrix.scales is not None:
+            blocks.append(matrix.scales.astype(np.float32))
+        _write_atomic(self._path(user_id, kind, 'sig'), header, *blocks)
+
+    @contextmanager
+    def writer_lock(self, user_id, kind):
+        """Exclusive lock held by the one process regenerating a user's files"""
+        with open(self._path(user_id, kind, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def delete(self, user_id, kind):
+        for suffix in ('sig', 'ids'):
+            try:
+                os.unlink(self._path(user_id, kind, suffix))
+            except FileNotFoundError:
+                pass
+
+
+def _map(path):
+    with open(path, 'rb') as store_file:
+        return mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_header(buffer):
+    """Return (format, precision, dimensions, rows, version) or None if invalid"""
+    if len(buffer) < HEADER_SIZE:
+        return None
+    magic, format_version, precision_code, dimensions, rows, version = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or format_version != FORMAT_VERSION or precision_code not in _PRECISIONS:
+        return None
+    return format_version, _PRECISIONS[precision_code], dimensions, rows, version
+
+
+def _write_atomic(path, header, *arrays):
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as store_file:
+        store_file.write(header)
+        for array in arrays:
+            store_file.write(array.tobytes())
+    os.replace(temp_path, path)
+
+
+_store = None
+
+
+def get_signature_store():
+    """Return the configured store, or None when SIGNATURE_STORE_DIR is empty"""
+    global _store
+
+    if not settings.SIGNATURE_STORE_DIR:
+        return None
+    if _store is None:
+        _store = SignatureStore(settings.SIGNATURE_STORE_DIR)
+    return _store
@@ -0,0 +1,34 @@
+import pytest
+from ai_pipeline.transcript_compaction import clean_text, compact_transcript
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('the budget is is 10 10 percent over', 'The budget is 10 percent over'),
+    ('I I think so', 'I think so'),
+    ('the, the plan', 'The plan'),
+    ('we- we said Friday', 'We said Friday'),
+    ('I... I guess', 'I guess'),
+    ('send it to to Ana', 'Send it to Ana'),
+    ('the the the end', 'The end'),
+])
+def test_clean_text_collapses_stutters(text, expected):
+    assert clean_text(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'He had had enough',
+    'What it is is fine',
+    'Very very good',
+    'It was over. Over the weekend we moved',
+    'Room 10 100 meters away',
+])
+def test_clean_text_keeps_deliberate_repeats(text):
+    assert clean_text(text) == text
+
+
+def test_compact_transcript_reports_token_stats():
+    compacted, stats = compact_transcript('Ana: um, the the meeting is at 3:30\nBruno: Yeah.')
+
+    assert compacted == 'Ana: The meeting is at 3:30'
+    assert stats['tokens_after'] < stats['tokens_before']
+    assert stats['ratio'] == stats['tokens_after'] / stats['tokens_before']
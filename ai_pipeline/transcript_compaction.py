@@ -0,0 +1,221 @@
+"""
+Transcript compaction for LLM prompts.
+
+Call transcripts are mostly tokens the note extractor does not need: filler
+words, stutters, noise markers from silent stretches, text repeated where two
+audio chunks overlap, and one line per short segment even when the same person
+keeps talking. compact_transcript strips all of that and then enforces a token
+budget, so the prompt cost of a call grows with what was said, not with how
+long it took to say it.
+
+Input and output use the format_transcript layout ('Speaker: text' lines);
+plain text without speakers is compacted as a single anonymous turn.
+"""
+import re
+from .config import AIConfig
+
+# Markers transcription emits for non-speech: [noise], (inaudible), <unk>, ...
+NOISE_MARKER = re.compile(
+    r'[\[(<]\s*(?:noise|silence|music|laughter|laughs|inaudible|crosstalk|unk|blank_audio|background[^\])>]*)\s*[\])>]',
+    re.IGNORECASE,
+)
+
+# Pure fillers; 'like', 'so', 'you know' and 'i mean' carry meaning too often to remove
+FILLER = re.compile(
+    r'(?:,\s*)?(?<![\w\'-])(?:uh-huh|u+h+m*|u+m+|e+r+m*|a+h+|h+m+|m+h*m+)(?![\w\'-]),?',
+    re.IGNORECASE,
+)
+
+# Stutters and restarts anywhere in a turn: "I I think", "the, the", "we- we",
+# "I... I", "10 10 percent". A sentence break ("over. Over") is not a stutter.
+REPEATED_WORD = re.compile(r'(?<![\w\'-])([^\W_]+)((?:(?:\s|,|-+|\u2026|\.{2,})+\1(?![\w\'-]))+)', re.IGNORECASE)
+
+# Words that are grammatical or emphatic when doubled: "had had", "that that", "very very"
+VALID_DOUBLES = {'had', 'that', 'do', 'no', 'so', 'very', 'really', 'bye', 'far', 'more', 'again'}
+
+# "is is" is only grammatical after a clause ending in "is": "what it is is"
+DOUBLE_IS = re.compile(r'\b(?:it|what|this|that)\s+$', re.IGNORECASE)
+
+# Turns that carry no information once fillers are gone, unless they answer a question
+BACKCHANNEL = re.compile(r'^(?:yeah|yep|ok(?:ay)?|right|sure|mhm|uh-huh|cool|great)[.!?]?$', re.IGNORECASE)
+
+# "Name: text" as format_transcript writes it - a speaker prefix is short, has no
+# sentence punctuation, and its colon is followed by a space, so times ("3:30")
+# and ratios are not mistaken for one
+SPEAKER_PREFIX = re.compile(r'^([^:.?!\n]{1,40})(?<!\d):(?:\s+(.*))?$')
+
+# Shortest repeated run of words treated as chunk-boundary overlap
+MIN_OVERLAP_WORDS = 3
+
+ELISION = '[...]'
+
+
+def count_tokens(text):
+    """
+    Count LLM tokens, with tiktoken if it is installed, otherwise estimated
+    at about four characters per token.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4
+
+    try:
+        encoding = tiktoken.encoding_for_model(AIConfig.LLM_MODEL)
+    except KeyError:
+        encoding = tiktoken.get_encoding('cl100k_base')
+    return len(encoding.encode(text))
+
+
+def parse_turns(transcription):
+    """
+    Split a transcript into (speaker, text) turns.
+
+    Returns:
+        List of (speaker or None, text) tuples
+    """
+    turns = []
+    for line in transcription.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = SPEAKER_PREFIX.match(line)
+        if match:
+            turns.append((match.group(1).strip(), match.group(2) or ''))
+        else:
+            turns.append((None, line))
+    return turns
+
+
+def _collapse_repeats(match):
+    word, repeats = match.group(1), match.group(2)
+    # A single doubling of such a word is usually deliberate
+    if len(re.findall(r'[^\W_]+', repeats)) == 1:
+        if word.lower() in VALID_DOUBLES:
+            return match.group(0)
+        if word.lower() == 'is' and DOUBLE_IS.search(match.string, 0, match.start()):
+            return match.group(0)
+    return word
+
+
+def clean_text(text):
+    """
+    Remove noise markers, fillers and stutters from one turn. Repeated words
+    and numbers are collapsed wherever they occur, also when separated by
+    commas, dashes or ellipses, but not across a sentence break.
+    """
+    text = NOISE_MARKER.sub(' ', text)
+    text = FILLER.sub(' ', text)
+    text = REPEATED_WORD.sub(_collapse_repeats, text)
+    text = re.sub(r'\s+([,.?!])', r'\1', text)
+    text = re.sub(r'([,.?!])(?:\s*[,.])+', r'\1', text)
+    text = re.sub(r'\s+', ' ', text).strip(' ,')
+    # Capitalise again if the sentence used to start with a filler
+    return text[:1].upper() + text[1:]
+
+
+def _strip_overlap(previous, text):
+    """
+    Remove the start of text that repeats the end of previous, as happens
+    when consecutive audio chunks overlap.
+    """
+    previous_words = previous.split()
+    words = text.split()
+
+    def normalise(word):
+        return re.sub(r'\W', '', word).lower()
+
+    for size in range(min(len(previous_words), len(words)), MIN_OVERLAP_WORDS - 1, -1):
+        if [normalise(word) for word in previous_words[-size:]] == [normalise(word) for word in words[:size]]:
+            return ' '.join(words[size:])
+    return text
+
+
+def merge_turns(turns):
+    """
+    Drop empty and duplicate turns, remove overlap text and merge consecutive
+    turns of the same speaker.
+    """
+    merged = []
+    for speaker, text in turns:
+        if not text:
+            continue
+        if merged and merged[-1][0] == speaker:
+            if len(text.split()) >= MIN_OVERLAP_WORDS and text in merged[-1][1]:
+                continue
+            text = _strip_overlap(merged[-1][1], text)
+            if text:
+                merged[-1] = (speaker, f'{merged[-1][1]} {text}')
+            continue
+        # "Sure." after "Can you send it over?" is an answer, not a backchannel
+        if merged and BACKCHANNEL.match(text) and not merged[-1][1].endswith('?'):
+            continue
+        merged.append((speaker, text))
+    return merged
+
+
+def format_turns(turns):
+    return '\n'.join(f'{speaker}: {text}' if speaker else text for speaker, text in turns)
+
+
+def _fit_budget(turns, max_tokens):
+    """
+    Elide turns from the middle of the call until the transcript fits.
+    Openings and wrap-ups carry most commitments, so both ends are kept.
+    """
+    costs = [count_tokens(format_turns([turn])) + 1 for turn in turns]
+    budget = max_tokens - count_tokens(ELISION) - 1
+    if sum(costs) <= max_tokens:
+        return turns
+
+    head, tail = [], []
+    start, end = 0, len(turns) - 1
+    while start <= end:
+        take_head = len(head) <= len(tail)
+        index = start if take_head else end
+        if costs[index] > budget:
+            break
+        budget -= costs[index]
+        if take_head:
+            head.append(turns[index])
+            start += 1
+        else:
+            tail.insert(0, turns[index])
+            end -= 1
+
+    if not head and not tail:
+        # A single oversized turn: keep its beginning
+        speaker, text = turns[0]
+        return [(speaker, text[:max_tokens * 4].rsplit(' ', 1)[0]), (None, ELISION)]
+    return head + [(None, ELISION)] + tail
+
+
+def compact_transcript(transcription, max_tokens=None):
+    """
+    Compact a transcript for use in an LLM prompt.
+
+    Args:
+        transcription: Transcript text, 'Speaker: text' lines or plain text
+        max_tokens: Token budget (default AIConfig.NOTE_TRANSCRIPT_MAX_TOKENS)
+
+    Returns:
+        Tuple of (compacted transcript, stats dict with 'tokens_before',
+        'tokens_after' and 'ratio')
+    """
+    if max_tokens is None:
+        max_tokens = AIConfig.NOTE_TRANSCRIPT_MAX_TOKENS
+
+    turns = [(speaker, clean_text(text)) for speaker, text in parse_turns(transcription or '')]
+    turns = merge_turns(turns)
+    if turns:
+        turns = _fit_budget(turns, max_tokens)
+    compacted = format_turns(turns)
+
+    tokens_before = count_tokens(transcription or '')
+    tokens_after = count_tokens(compacted)
+    stats = {
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'ratio': tokens_after / tokens_before if tokens_before else 1.0,
+    }
+    return compacted, stats
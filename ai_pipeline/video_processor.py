@@ -8,47 +8,112 @@ import face_recognition
 from .config import AIConfig
 
 
+def load_frame(image_bytes):
+    """
+    Decode an image into an RGB numpy array.
+
+    Args:
+        image_bytes: Bytes of the image (PNG, JPEG, etc.), or a file-like
+            object such as a memory-mapped blob
+
+    Returns:
+        numpy array of shape (height, width, 3)
+    """
+    # File-like blobs are read without copying
+    if not hasattr(image_bytes, 'read'):
+        image_bytes = io.BytesIO(image_bytes)
+    image = Image.open(image_bytes)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image)
+
+
 def extract_faces_from_frame(image_bytes):
     """
     Extract faces from a video frame.
 
     Args:
-        image_bytes: Bytes of the image (PNG, JPEG, etc.)
+        image_bytes: Bytes of the image (PNG, JPEG, etc.), or a file-like
+            object such as a memory-mapped blob
 
     Returns:
         List of dicts with face locations and embeddings
     """
     try:
-        # Load image from bytes
-        image = Image.open(io.BytesIO(image_bytes))
-        image_array = np.array(image)
+        return detect_faces(load_frame(image_bytes))
+
+    except Exception as e:
+        print(f"Error extracting faces: {e}")
+        return []
+
+
+def extract_faces_from_frames(image_arrays):
+    """
+    Extract faces from a batch of decoded frames.
+    With the CNN model and equally sized frames, detection runs as one batch.
+
+    Args:
+        image_arrays: List of RGB numpy arrays (see load_frame)
+
+    Returns:
+        List with a list of face dicts per frame
+    """
+    if not image_arrays:
+        return []
 
-        # Detect faces
+    try:
+        shapes = {image.shape for image in image_arrays}
+        if AIConfig.FACE_RECOGNITION_MODEL == 'cnn' and len(shapes) == 1:
+            batch_locations = face_recognition.batch_face_locations(
+                list(image_arrays),
+                batch_size=len(image_arrays)
+            )
+            return [
+                detect_faces(image, locations)
+                for image, locations in zip(image_arrays, batch_locations)
+            ]
+
+        return [detect_faces(image) for image in image_arrays]
+
+    except Exception as e:
+        print(f"Error extracting faces: {e}")
+        return [[] for _ in image_arrays]
+
+
+def detect_faces(image_array, face_locations=None):
+    """
+    Detect faces in a decoded frame and generate their embeddings.
+
+    Args:
+        image_array: RGB numpy array
+        face_locations: Precomputed face locations, detected if omitted
+
+    Returns:
+        List of dicts with face locations and embeddings
+    """
+    # Detect faces
+    if face_locations is None:
         face_locations = face_recognition.face_locations(
             image_array,
             model=AIConfig.FACE_RECOGNITION_MODEL
         )
 
-        # Generate face embeddings
-        face_encodings = face_recognition.face_encodings(
-            image_array,
-            face_locations
-        )
-
-        # Prepare results
-        faces = []
-        for location, encoding in zip(face_locations, face_encodings):
-            faces.append({
-                'location': location,  # (top, right, bottom, left)
-                'embedding': encoding,  # 128-dimensional vector
-                'confidence': 1.0  # face_recognition doesn't provide confidence scores
-            })
+    # Generate face embeddings
+    face_encodings = face_recognition.face_encodings(
+        image_array,
+        face_locations
+    )
 
-        return faces
+    # Prepare results
+    faces = []
+    for location, encoding in zip(face_locations, face_encodings):
+        faces.append({
+            'location': location,  # (top, right, bottom, left)
+            'embedding': encoding,  # 128-dimensional vector
+            'confidence': 1.0  # face_recognition doesn't provide confidence scores
+        })
 
-    except Exception as e:
-        print(f"Error extracting faces: {e}")
-        return []
+    return faces
 
 
 def extract_frame_from_video(video_bytes, frame_number=0):
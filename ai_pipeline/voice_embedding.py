@@ -0,0 +1,224 @@
+"""
+Voice embedding backends.
+
+A backend turns speech segments (mono float32 PCM at SAMPLE_RATE) into
+fixed-size speaker embeddings. The backend is chosen with the
+VOICE_EMBEDDING_BACKEND setting (a dotted path), so a neural model can be
+dropped in later without touching the callers.
+
+The default MFCCStatsBackend needs nothing beyond numpy/scipy and runs
+offline on CPU. Each segment is summarised by the mean and log standard
+deviation of its MFCCs (without c0, which only tracks loudness) and the log
+standard deviation of their deltas, a classic text-independent speaker
+descriptor. The statistics are standardised, either against a background
+fitted on real speech (VOICE_EMBEDDING_BACKGROUND, see fit_background) or by
+centring each block, then mapped to VOICE_EMBEDDING_DIMENSIONS by a fixed,
+seeded random projection so embeddings stay comparable across processes and
+restarts.
+"""
+import io
+import os
+import wave
+import numpy as np
+from scipy.fft import dct
+from .config import AIConfig
+
+SAMPLE_RATE = 16000
+
+
+class VoiceEmbeddingBackend:
+    """Base class for voice embedding backends"""
+
+    dimensions = AIConfig.VOICE_EMBEDDING_DIMENSIONS
+
+    def embed_batch(self, segments):
+        """
+        Embed several speech segments at once.
+
+        Args:
+            segments: List of 1-D float32 arrays (mono PCM at SAMPLE_RATE)
+
+        Returns:
+            Array of shape (len(segments), dimensions)
+        """
+        raise NotImplementedError
+
+    def embed(self, segment):
+        return self.embed_batch([segment])[0]
+
+
+class MFCCStatsBackend(VoiceEmbeddingBackend):
+    """MFCC statistics with a fixed random projection"""
+
+    frame_length = 400  # 25 ms
+    hop_length = 160  # 10 ms
+    n_fft = 512
+    n_mels = 40
+    n_mfcc = 20
+    projection_seed = 20240611
+
+    def __init__(self, background=None):
+        self.window = np.hamming(self.frame_length).astype(np.float32)
+        self.mel_filters = _mel_filterbank(self.n_mels, self.n_fft, SAMPLE_RATE)
+        rng = np.random.default_rng(self.projection_seed)
+        self.projection = (
+            rng.normal(size=(self.statistics_size, self.dimensions)) / np.sqrt(self.dimensions)
+        ).astype(np.float32)
+
+        # background: dict from fit_background, or a path to one saved with np.savez
+        if background is None:
+            from django.conf import settings
+            background = settings.VOICE_EMBEDDING_BACKGROUND or None
+        if isinstance(background, (str, os.PathLike)):
+            background = np.load(background)
+        self.background = (background['mean'], background['scale']) if background is not None else None
+
+    @property
+    def statistics_size(self):
+        # MFCC means, MFCC log stds and delta log stds, c0 excluded
+        return 3 * (self.n_mfcc - 1)
+
+    def statistics_batch(self, segments):
+        """
+        Per-segment MFCC statistics, computed with one FFT over all frames.
+
+        Returns:
+            Array of shape (len(segments), statistics_size)
+        """
+        frames = [self._frames(segment) for segment in segments]
+        counts = [len(segment_frames) for segment_frames in frames]
+
+        spectrum = np.abs(np.fft.rfft(np.concatenate(frames) * self.window, n=self.n_fft)) ** 2
+        log_mel = np.log(spectrum @ self.mel_filters.T + 1e-10)
+        mfcc = dct(log_mel, type=2, axis=1, norm='ortho')[:, 1:self.n_mfcc].astype(np.float32)
+
+        statistics = np.empty((len(segments), self.statistics_size), dtype=np.float32)
+        start = 0
+        for index, count in enumerate(counts):
+            coefficients = mfcc[start:start + count]
+            deltas = np.diff(coefficients, axis=0) if count > 1 else coefficients
+            statistics[index] = np.concatenate([
+                coefficients.mean(axis=0),
+                np.log(coefficients.std(axis=0) + 1e-5),
+                np.log(deltas.std(axis=0) + 1e-5),
+            ])
+            start += count
+        return statistics
+
+    def fit_background(self, segments):
+        """
+        Fit standardisation statistics on a sample of real speech.
+        Save the result with np.savez and point VOICE_EMBEDDING_BACKGROUND at it.
+
+        Returns:
+            Dict with per-statistic 'mean' and 'scale' arrays
+        """
+        statistics = self.statistics_batch(segments)
+        return {'mean': statistics.mean(axis=0), 'scale': statistics.std(axis=0) + 1e-5}
+
+    def project(self, statistics):
+        """Map segment statistics to L2-normalised embeddings"""
+        if self.background is not None:
+            mean, scale = self.background
+            standardised = (statistics - mean) / scale
+        else:
+            # Without a background, remove each block's common offset so
+            # the shape of the statistics, not their level, is compared
+            blocks = statistics.reshape(len(statistics), 3, self.n_mfcc - 1)
+            standardised = (blocks - blocks.mean(axis=2, keepdims=True)).reshape(len(statistics), -1)
+
+        embeddings = standardised @ self.projection
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    def embed_batch(self, segments):
+        if not segments:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        return self.project(self.statistics_batch(segments))
+
+    def _frames(self, segment):
+        segment = np.asarray(segment, dtype=np.float32)
+        # Pre-emphasis boosts the high frequencies that carry speaker detail
+        segment = np.append(segment[:1], segment[1:] - 0.97 * segment[:-1])
+        if len(segment) < self.frame_length:
+            segment = np.pad(segment, (0, self.frame_length - len(segment)))
+        count = 1 + (len(segment) - self.frame_length) // self.hop_length
+        return np.lib.stride_tricks.as_strided(
+            segment,
+            shape=(count, self.frame_length),
+            strides=(segment.strides[0] * self.hop_length, segment.strides[0]),
+        )
+
+
+def _mel_filterbank(n_mels, n_fft, sample_rate):
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for index in range(1, n_mels + 1):
+        left, centre, right = bins[index - 1], bins[index], bins[index + 1]
+        if centre > left:
+            filters[index - 1, left:centre] = (np.arange(left, centre) - left) / (centre - left)
+        if right > centre:
+            filters[index - 1, centre:right] = (right - np.arange(centre, right)) / (right - centre)
+    return filters
+
+
+_backend = None
+
+
+def get_voice_backend():
+    """Return the backend configured by VOICE_EMBEDDING_BACKEND"""
+    global _backend
+    if _backend is None:
+        from django.conf import settings
+        from django.utils.module_loading import import_string
+
+        _backend = import_string(settings.VOICE_EMBEDDING_BACKEND)()
+    return _backend
+
+
+def encode_wav(pcm):
+    """Encode mono float32 PCM at SAMPLE_RATE as 16-bit WAV bytes"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((np.clip(pcm, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def decode_audio(audio_bytes):
+    """
+    Decode an audio file (WAV, MP3, WebM, ...) to mono float32 PCM at SAMPLE_RATE.
+    WAV already in that format (as written by encode_wav) is read directly.
+    """
+    if bytes(audio_bytes[:4]) == b'RIFF':
+        with wave.open(io.BytesIO(bytes(audio_bytes))) as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, SAMPLE_RATE):
+                return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(io.BytesIO(bytes(audio_bytes)))
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def embed_segments(segments):
+    """
+    Embed speech segments with the configured backend, in one batch.
+
+    Args:
+        segments: List of 1-D float32 PCM arrays at SAMPLE_RATE
+
+    Returns:
+        Array of shape (len(segments), dimensions)
+    """
+    return get_voice_backend().embed_batch(segments)
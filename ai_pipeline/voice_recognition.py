@@ -1,19 +1,17 @@
 """
 Voice recognition module for speaker identification.
-Note: This is a placeholder for future implementation.
 """
 import numpy as np
-from scipy.spatial.distance import cosine
 from .config import AIConfig
+from .signature_cache import get_signature_matrix
+from .voice_embedding import decode_audio, get_voice_backend
 
 
 def extract_voice_embedding(audio_bytes):
     """
     Extract voice embedding from audio bytes.
-    This is a placeholder - actual implementation would use a model like:
-    - SpeechBrain
-    - pyannote.audio
-    - Resemblyzer
+    Uses the backend configured by VOICE_EMBEDDING_BACKEND; to embed many
+    segments at once, use voice_embedding.embed_segments instead.
 
     Args:
         audio_bytes: Audio data in bytes
@@ -21,9 +19,7 @@ def extract_voice_embedding(audio_bytes):
     Returns:
         Voice embedding (512-dimensional vector)
     """
-    # Placeholder: return random embedding
-    # TODO: Implement actual voice embedding extraction
-    return np.random.rand(AIConfig.VOICE_EMBEDDING_DIMENSIONS)
+    return get_voice_backend().embed(decode_audio(audio_bytes))
 
 
 def match_voice(user_id, voice_embedding):
@@ -37,24 +33,32 @@ def match_voice(user_id, voice_embedding):
     Returns:
         Relationship object if match found, None otherwise
     """
-    from apps.signatures.models import VoiceSignature
+    return match_voices(user_id, [voice_embedding])[0]
+
 
-    signatures = VoiceSignature.objects.filter(
-        relationship__user_id=user_id
-    ).select_related('relationship')
+def match_voices(user_id, voice_embeddings):
+    """
+    Match several voice embeddings at once against the user's voice signatures.
+
+    Args:
+        user_id: ID of the user
+        voice_embeddings: Sequence or (n, 512) array of voice embeddings
+
+    Returns:
+        List with a Relationship object (or None) per embedding
+    """
+    from apps.relationships.models import Relationship
 
-    best_match = None
-    best_similarity = 0
+    if len(voice_embeddings) == 0:
+        return []
 
-    for signature in signatures:
-        stored_embedding = np.array(signature.embedding)
-        similarity = 1 - cosine(voice_embedding, stored_embedding)
+    matrix = get_signature_matrix(user_id, 'voice')
+    matches = matrix.match(np.asarray(voice_embeddings), AIConfig.VOICE_MATCH_THRESHOLD)
 
-        if similarity > best_similarity and similarity >= AIConfig.VOICE_MATCH_THRESHOLD:
-            best_similarity = similarity
-            best_match = signature.relationship
+    relationship_ids = {relationship_id for relationship_id, _ in matches if relationship_id is not None}
+    relationships = Relationship.objects.in_bulk(relationship_ids) if relationship_ids else {}
 
-    return best_match
+    return [relationships.get(relationship_id) for relationship_id, _ in matches]
 
 
 def create_voice_signature(relationship, voice_embedding, audio_path=None):
@@ -73,7 +77,7 @@ def create_voice_signature(relationship, voice_embedding, audio_path=None):
 
     signature = VoiceSignature.objects.create(
         relationship=relationship,
-        embedding=voice_embedding.tolist(),
+        embedding=np.asarray(voice_embedding).tolist(),
         audio_path=audio_path,
         confidence_score=1.0
     )
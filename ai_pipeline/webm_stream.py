@@ -0,0 +1,359 @@
+"""
+Incremental WebM/Opus decoding for MediaRecorder audio.
+
+MediaRecorder emits one WebM stream split into arbitrary chunks: only the first
+chunk has the EBML header and track info, later chunks start mid-cluster (or
+even mid-element). WebMOpusStream keeps the demuxer and decoder state for the
+whole call, so each chunk is parsed and decoded exactly once, as it arrives.
+
+Memory stays bounded: parsed bytes are dropped immediately, elements we do not
+need are skipped without being buffered, and only a partially received element
+header or block is ever held back.
+"""
+import time
+import numpy as np
+from .voice_embedding import SAMPLE_RATE
+
+# Matroska element ids (with their length marker bits, as they appear on the wire)
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+CLUSTER = 0x1F43B675
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+CODEC_ID = 0x86
+CODEC_PRIVATE = 0x63A2
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+SIMPLE_BLOCK = 0xA3
+
+# Containers we descend into instead of skipping
+MASTER_ELEMENTS = {SEGMENT, CLUSTER, TRACKS, TRACK_ENTRY, BLOCK_GROUP}
+
+# Leaf elements whose payload we need
+DATA_ELEMENTS = {TRACK_NUMBER, CODEC_ID, CODEC_PRIVATE, BLOCK, SIMPLE_BLOCK}
+
+# Largest leaf element we are willing to buffer (an Opus block is a few hundred bytes)
+MAX_ELEMENT_SIZE = 1 << 20
+
+
+class WebMStreamError(ValueError):
+    """The stream is not a WebM/Opus stream we can decode."""
+
+
+def _read_vint(buffer, offset, keep_marker):
+    """
+    Read an EBML variable-length integer.
+
+    Returns:
+        Tuple of (value, length, all_ones), or None if the buffer is too short
+    """
+    if offset >= len(buffer):
+        return None
+    first = buffer[offset]
+    if first == 0:
+        raise WebMStreamError('Invalid EBML variable-length integer')
+    length = 8 - first.bit_length() + 1
+    if offset + length > len(buffer):
+        return None
+
+    value = first if keep_marker else first & (0xFF >> length)
+    all_ones = value == (0xFF >> length)
+    for byte in buffer[offset + 1:offset + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return value, length, all_ones
+
+
+class WebMOpusDemuxer:
+    """Push-based Matroska parser yielding the Opus packets of the audio track"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._skip = 0
+        self._track = {}
+        self.track_number = None
+        self.codec_private = None
+        # Reported once per call by CallAudioStreams, not per block
+        self.laced_blocks = 0
+
+    def feed(self, data):
+        """
+        Parse the next chunk of the stream.
+
+        Returns:
+            List of Opus packets (bytes) completed by this chunk
+        """
+        packets = []
+        data = memoryview(data)
+
+        # Finish skipping an element we are not interested in
+        if self._skip:
+            skipped = min(self._skip, len(data))
+            self._skip -= skipped
+            data = data[skipped:]
+        self._buffer += data
+
+        offset = 0
+        buffer = self._buffer
+        while True:
+            parsed_id = _read_vint(buffer, offset, keep_marker=True)
+            if parsed_id is None:
+                break
+            parsed_size = _read_vint(buffer, offset + parsed_id[1], keep_marker=False)
+            if parsed_size is None:
+                break
+
+            element_id, id_length, _ = parsed_id
+            size, size_length, unknown_size = parsed_size
+            header_end = offset + id_length + size_length
+
+            if element_id in MASTER_ELEMENTS:
+                # Children follow directly; unknown sizes (live streams) are fine
+                if element_id == TRACK_ENTRY:
+                    self._track = {}
+                offset = header_end
+                continue
+
+            if unknown_size:
+                raise WebMStreamError(f'Unknown size for element 0x{element_id:X}')
+
+            if element_id not in DATA_ELEMENTS:
+                # Skip without buffering, possibly across future chunks
+                available = len(buffer) - header_end
+                if size > available:
+                    self._skip = size - available
+                    offset = len(buffer)
+                    break
+                offset = header_end + size
+                continue
+
+            if size > MAX_ELEMENT_SIZE:
+                raise WebMStreamError(f'Element 0x{element_id:X} too large ({size} bytes)')
+            if header_end + size > len(buffer):
+                break
+
+            payload = bytes(buffer[header_end:header_end + size])
+            offset = header_end + size
+            packet = self._handle(element_id, payload)
+            if packet is not None:
+                packets.append(packet)
+
+        del self._buffer[:offset]
+        return packets
+
+    def _handle(self, element_id, payload):
+        if element_id == TRACK_NUMBER:
+            self._track['number'] = int.from_bytes(payload, 'big')
+        elif element_id == CODEC_ID:
+            self._track['codec'] = payload.rstrip(b'\0').decode('ascii', 'replace')
+        elif element_id == CODEC_PRIVATE:
+            self._track['private'] = payload
+
+        if self.track_number is None and self._track.get('codec') == 'A_OPUS' and 'number' in self._track:
+            self.track_number = self._track['number']
+        if self._track.get('number') == self.track_number and 'private' in self._track:
+            self.codec_private = self._track['private']
+
+        if element_id in (SIMPLE_BLOCK, BLOCK):
+            return self._block_frame(payload)
+        return None
+
+    def _block_frame(self, payload):
+        track = _read_vint(payload, 0, keep_marker=False)
+        if track is None or track[0] != self.track_number:
+            return None
+        # track number, 16-bit relative timecode, flags
+        flags = payload[track[1] + 2]
+        if flags & 0x06:
+            # MediaRecorder never laces Opus frames; skip rather than misdecode
+            self.laced_blocks += 1
+            return None
+        return payload[track[1] + 3:]
+
+
+class WebMOpusStream:
+    """
+    Stateful WebM/Opus to PCM decoder for one call.
+
+    Feed MediaRecorder chunks in order; each call returns the newly decoded
+    mono float32 PCM at voice_embedding.SAMPLE_RATE.
+    """
+
+    def __init__(self):
+        import av
+
+        self.demuxer = WebMOpusDemuxer()
+        self._decoder = None
+        self._resampler = av.AudioResampler(format='s16', layout='mono', rate=SAMPLE_RATE)
+
+    def _get_decoder(self):
+        import av
+
+        if self._decoder is None:
+            self._decoder = av.CodecContext.create('opus', 'r')
+            if self.demuxer.codec_private:
+                self._decoder.extradata = self.demuxer.codec_private
+        return self._decoder
+
+    def feed(self, data):
+        """
+        Decode the next MediaRecorder chunk.
+
+        Returns:
+            1-D float32 array of new PCM samples (possibly empty)
+        """
+        import av
+
+        frames = []
+        for packet_data in self.demuxer.feed(data):
+            frames.extend(self._get_decoder().decode(av.Packet(packet_data)))
+        return self._resample(frames)
+
+    def flush(self):
+        """
+        Drain the decoder and the resampler at the end of the stream.
+
+        Returns:
+            1-D float32 array of the samples they still held back
+        """
+        frames = list(self._decoder.decode(None)) if self._decoder is not None else []
+        # None as the last frame makes the resampler emit its delay line
+        return self._resample(frames + [None])
+
+    def _resample(self, frames):
+        pcm = []
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                pcm.append(resampled.to_ndarray().reshape(-1))
+
+        if not pcm:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(pcm).astype(np.float32) / 32768.0
+
+
+class CallAudioStream:
+    """
+    Per-call audio pipeline for the WebSocket consumer.
+
+    Decodes MediaRecorder chunks as they arrive and groups the PCM into
+    segments of about segment_seconds, each tagged with the timestamp of the
+    chunk it starts in, ready to be transcribed.
+    """
+
+    def __init__(self, segment_seconds):
+        self.decoder = WebMOpusStream()
+        self.segment_samples = int(segment_seconds * SAMPLE_RATE)
+        self._pending = []
+        self._pending_samples = 0
+        self._pending_timestamp = None
+
+    def feed(self, data, timestamp):
+        """
+        Decode a chunk.
+
+        Returns:
+            List of (pcm, timestamp) segments that are complete
+        """
+        self._append(self.decoder.feed(data), timestamp)
+        if self._pending_samples >= self.segment_samples:
+            return [self.flush()]
+        return []
+
+    def close(self, timestamp=None):
+        """
+        End the stream: drain the decoder and return the last segment, or None.
+
+        timestamp tags the drained samples if nothing else is buffered.
+        """
+        self._append(self.decoder.flush(), timestamp)
+        return self.flush()
+
+    def flush(self):
+        """Return the buffered PCM as one segment, or None if there is none"""
+        if not self._pending:
+            return None
+        segment = (np.concatenate(self._pending), self._pending_timestamp)
+        self._pending, self._pending_samples = [], 0
+        return segment
+
+    def _append(self, pcm, timestamp):
+        if len(pcm):
+            if not self._pending:
+                self._pending_timestamp = timestamp
+            self._pending.append(pcm)
+            self._pending_samples += len(pcm)
+
+
+class CallAudioStreams:
+    """
+    The open CallAudioStream of each call, kept by the worker process that
+    decodes them.
+
+    A MediaRecorder stream can only be decoded in order and by the decoder that
+    saw its header, so all chunks of a call must reach the same process: the
+    audio_decode queue is served by a single worker process. Streams of calls
+    that never sent call_end are dropped after idle_seconds.
+
+    Chunks dropped and blocks skipped are counted and printed once per call,
+    when its stream ends, not once per chunk.
+    """
+
+    def __init__(self, segment_seconds, idle_seconds):
+        self.segment_seconds = segment_seconds
+        self.idle_seconds = idle_seconds
+        self._streams = {}
+        # call_id -> [chunks dropped for want of an open stream, last drop time]
+        self._dropped = {}
+
+    def feed(self, call_id, data, timestamp):
+        """
+        Decode the next chunk of a call.
+
+        Returns:
+            List of (pcm, timestamp) segments that are complete
+        """
+        self._expire()
+        # A chunk starting with the EBML header opens a new MediaRecorder stream
+        if is_webm(data):
+            self._report_dropped(call_id)
+            self._report_skipped(call_id, self._streams.get(call_id))
+            self._streams[call_id] = [CallAudioStream(self.segment_seconds), None]
+        entry = self._streams.get(call_id)
+        if entry is None:
+            # The chunks after the header cannot be decoded on their own
+            dropped = self._dropped.setdefault(call_id, [0, None])
+            dropped[0] += 1
+            dropped[1] = time.monotonic()
+            return []
+        entry[1] = time.monotonic()
+        return entry[0].feed(data, timestamp)
+
+    def close(self, call_id, timestamp=None):
+        """End a call's stream and return its last segment, or None"""
+        self._report_dropped(call_id)
+        entry = self._streams.pop(call_id, None)
+        self._report_skipped(call_id, entry)
+        return entry[0].close(timestamp) if entry is not None else None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for call_id in [key for key, (_, used) in self._streams.items() if used < cutoff]:
+            self._report_skipped(call_id, self._streams.pop(call_id))
+        for call_id in [key for key, (_, dropped_at) in self._dropped.items() if dropped_at < cutoff]:
+            self._report_dropped(call_id)
+
+    def _report_dropped(self, call_id):
+        dropped = self._dropped.pop(call_id, None)
+        if dropped is not None:
+            print(f"No open audio stream for call {call_id}, dropped {dropped[0]} chunks")
+
+    def _report_skipped(self, call_id, entry):
+        laced_blocks = entry[0].decoder.demuxer.laced_blocks if entry is not None else 0
+        if laced_blocks:
+            print(f"WebM stream of call {call_id} uses lacing, skipped {laced_blocks} blocks")
+
+
+def is_webm(data):
+    """True if data starts a WebM/Matroska stream"""
+    return bytes(data[:4]) == EBML_HEADER.to_bytes(4, 'big')
@@ -0,0 +1,62 @@
+"""
+Helpers for bulk endpoints.
+
+Rows arrive as a JSON array or as streamed NDJSON and are processed in
+batches: each batch is validated row by row against one serializer instance,
+written with a single bulk statement in its own transaction, and any row
+that fails validation is reported by its index instead of failing the
+whole request.
+"""
+from itertools import islice
+from types import GeneratorType
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+BULK_BATCH_SIZE = 1000
+
+
+def iter_batches(rows, size=BULK_BATCH_SIZE):
+    """Yield lists of (index, row) from any iterable of rows"""
+    rows = enumerate(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validate_batch(serializer, batch, errors):
+    """
+    Validate each row of a batch with serializer.run_validation.
+
+    Args:
+        serializer: Serializer instance (not bound to data), reused for every row
+        batch: List of (index, row) tuples
+        errors: List that receives {'index': i, 'errors': {...}} for failed rows
+
+    Returns:
+        List of (index, validated_data) tuples for the valid rows
+    """
+    valid = []
+    for index, row in batch:
+        if isinstance(row, ParseError):
+            errors.append({'index': index, 'errors': {'non_field_errors': [str(row.detail)]}})
+            continue
+        try:
+            valid.append((index, serializer.run_validation(row)))
+        except serializers.ValidationError as e:
+            errors.append({'index': index, 'errors': e.detail})
+    return valid
+
+
+def request_rows(request):
+    """The request body as an iterable of rows: a JSON array or NDJSON lines"""
+    data = request.data
+    if isinstance(data, dict):
+        # A single object posted to a bulk endpoint
+        return [data]
+    if isinstance(data, (list, GeneratorType)):
+        # NDJSONParser yields rows lazily
+        return data
+    # A JSON scalar or string would otherwise be iterated character by character
+    raise ParseError('Expected a JSON array or NDJSON')
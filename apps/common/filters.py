@@ -0,0 +1,66 @@
+"""
+Postgres full-text search for the `search` query param.
+
+SearchFilter turns every search field into ILIKE '%term%', a sequential scan
+over the whole TextField. Models with a generated tsvector column (and a GIN
+index on it) are searched through the index instead: the terms are parsed with
+websearch_to_tsquery, so quoted phrases, OR and -exclusions work as users
+expect, results are ranked, and a highlighted snippet is annotated as
+search_headline.
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Full-text search on the view's search_vector_field.
+
+    View attributes:
+        search_vector_field: Generated tsvector column to match against
+        search_config: Text search configuration it was built with
+        search_headline_field: Text field to take the highlighted snippet from
+
+    Views without search_vector_field fall back to SearchFilter. Results are
+    ordered by rank unless the client asked for an explicit ordering, so list
+    this backend after OrderingFilter.
+    """
+
+    headline_options = {
+        'start_sel': '<mark>',
+        'stop_sel': '</mark>',
+        'max_words': 35,
+        'min_words': 15,
+        'max_fragments': 2,
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        vector_field = getattr(view, 'search_vector_field', None)
+        if vector_field is None:
+            return super().filter_queryset(request, queryset, view)
+
+        # websearch_to_tsquery does its own parsing of the raw input
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+
+        config = getattr(view, 'search_config', 'english')
+        query = SearchQuery(terms, search_type='websearch', config=config)
+        queryset = queryset.filter(**{vector_field: query}).annotate(
+            # ts_rank is a real; as a double it survives a round trip through
+            # a pagination cursor exactly
+            search_rank=Cast(SearchRank(F(vector_field), query), FloatField()),
+        )
+
+        headline_field = getattr(view, 'search_headline_field', None)
+        if headline_field:
+            # Only computed for the rows of the returned page
+            queryset = queryset.annotate(
+                search_headline=SearchHeadline(headline_field, query, config=config, **self.headline_options),
+            )
+
+        if not request.query_params.get(filters.OrderingFilter.ordering_param):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
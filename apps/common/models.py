@@ -0,0 +1,22 @@
+class CounterFieldsMixin:
+    """
+    Model mixin for denormalised counters kept with F() updates.
+
+    A plain save() writes every column back from the instance, so a counter
+    loaded before a concurrent F() update would overwrite it with the old
+    value. Saves of existing rows leave counter_fields out; only the signal
+    handlers and rebuild_counters, which use queryset.update(), change them.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not self._state.adding:
+            # Deferred columns are left out too, as a plain save() would do
+            skipped = set(self.counter_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.name not in skipped and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,30 @@
+import json
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Parses lazily: request.data is a generator that reads the body line by
+    line, so large uploads are never held in memory. A line that is not valid
+    JSON is yielded as a ParseError for the caller to report against that row.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return self._rows(stream, encoding)
+
+    def _rows(self, stream, encoding):
+        if stream is None:
+            return
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except (UnicodeDecodeError, ValueError) as e:
+                yield ParseError(f'Invalid JSON: {e}')
@@ -0,0 +1,274 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns model values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.EmailField,
+    serializers.FloatField, serializers.IntegerField, serializers.ReadOnlyField,
+)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets.
+
+    Keyword arguments:
+        fields: Names of the fields to return (None for all)
+        expand: Names of Meta.expandable_fields to return
+        omit_expandable: Leave out Meta.expandable_fields unless expanded or
+            named in fields, as list endpoints do for heavy or nested fields
+
+    optimize_queryset then reads only the columns the remaining fields need.
+    """
+
+    def __init__(self, *args, **kwargs):
+        requested = kwargs.pop('fields', None)
+        expand = set(kwargs.pop('expand', None) or ())
+        omit_expandable = kwargs.pop('omit_expandable', False)
+        super().__init__(*args, **kwargs)
+
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        for name in list(self.fields):
+            if self.fields[name].write_only or name in expand:
+                continue
+            if requested is not None:
+                if name not in requested:
+                    self.fields.pop(name)
+            elif omit_expandable and name in expandable:
+                self.fields.pop(name)
+
+    def optimize_queryset(self, queryset, extra_columns=()):
+        """
+        Restrict queryset to the columns and relations the readable fields use.
+
+        Args:
+            queryset: Queryset of Meta.model
+            extra_columns: Columns needed besides the fields, e.g. for ordering
+
+        Returns:
+            The queryset with only(), select_related() and prefetch_related() set
+        """
+        model = queryset.model
+        columns = {model._meta.pk.name, *extra_columns}
+        select, prefetch = [], []
+
+        for field in self.fields.values():
+            if field.write_only or field.source == '*':
+                continue
+            name = field.source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations and properties
+                continue
+
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.append(name)
+                continue
+            columns.add(name)
+            # A foreign key rendered as a nested object needs the related row;
+            # as a primary key, the local column is enough
+            if model_field.is_relation and isinstance(field, serializers.BaseSerializer):
+                select.append(name)
+
+        queryset = queryset.only(*columns)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class UnsupportedField(Exception):
+    """A serializer field ValuesReader cannot read from .values() rows"""
+
+
+class _ISODateTime:
+    """
+    DateTimeField.to_representation for ISO 8601 output, with the current
+    timezone looked up once per response (zone[0]) rather than per value.
+    """
+
+    def __init__(self, field, zone):
+        self.field = field
+        self.zone = zone
+
+    def __call__(self, value):
+        if value.utcoffset() is None:
+            return self.field.to_representation(value)
+        value = value.astimezone(self.zone[0]).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+class ValuesReader:
+    """
+    Builds a ModelSerializer's representation straight from .values() rows.
+
+    Model instances and the per-field get_attribute/to_representation calls
+    are what make large list responses slow. The reader works out once which
+    column each readable field comes from and copies the values across,
+    converting only the fields whose representation differs from the stored
+    value: ISO 8601 datetimes as DateTimeField formats them, anything else
+    with the field's own to_representation, so the output is identical to
+    serializer.data. Nested serializers on foreign
+    keys are joined into the same query; those on many-to-many fields are
+    read with one extra query per page.
+
+    Supported fields are model columns, primary key related fields, nested
+    ModelSerializers and annotations; for anything else for_serializer
+    returns None and the caller uses the serializer.
+    """
+
+    def __init__(self, serializer, prefix='', zone=None):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise UnsupportedField(type(serializer).__name__)
+
+        self.model = serializer.Meta.model
+        self.pk_column = prefix + self.model._meta.pk.name
+        self.columns = [self.pk_column]
+        self.annotations = []
+        self.fields = []
+        self.many = []
+        # Current timezone for datetime fields, shared with nested readers
+        self.zone = [None] if zone is None else zone
+
+        for field in serializer._readable_fields:
+            source = field.source
+            if source == '*' or '.' in source or (prefix and isinstance(field, serializers.ListSerializer)):
+                raise UnsupportedField(field.field_name)
+            try:
+                model_field = self.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                # An annotation, only present when the queryset has it;
+                # properties and methods need the model instance
+                if prefix or type(field) not in PASSTHROUGH_FIELDS or hasattr(self.model, source):
+                    raise UnsupportedField(field.field_name)
+                self.annotations.append(source)
+                self.fields.append((field.field_name, source, None, None))
+                continue
+
+            if isinstance(field, serializers.ListSerializer):
+                if not model_field.many_to_many or model_field.auto_created:
+                    raise UnsupportedField(field.field_name)
+                target = model_field.m2m_reverse_field_name()
+                child = ValuesReader(field.child, f'{target}__', self.zone)
+                self.many.append((field.field_name, model_field, target, child))
+                # Filled in from the extra query, in the serializer's field order
+                self.fields.append((field.field_name, None, None, None))
+                continue
+            if not model_field.concrete or model_field.many_to_many:
+                raise UnsupportedField(field.field_name)
+
+            column = prefix + source
+            if isinstance(field, serializers.ModelSerializer):
+                if not model_field.is_relation:
+                    raise UnsupportedField(field.field_name)
+                child = ValuesReader(field, f'{column}__', self.zone)
+                self.columns += child.columns
+                self.fields.append((field.field_name, child.pk_column, None, child))
+            elif isinstance(field, relations.RelatedField):
+                # values() reads a foreign key as the related primary key
+                if type(field) is not relations.PrimaryKeyRelatedField or field.pk_field is not None:
+                    raise UnsupportedField(field.field_name)
+                self.columns.append(column)
+                self.fields.append((field.field_name, column, None, None))
+            else:
+                convert = self._converter(field)
+                self.columns.append(column)
+                self.fields.append((field.field_name, column, convert, None))
+
+    def _converter(self, field):
+        if type(field) in PASSTHROUGH_FIELDS:
+            return None
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if (
+            type(field) is serializers.DateTimeField and settings.USE_TZ and not hasattr(field, 'timezone')
+            and isinstance(output_format, str) and output_format.lower() == ISO_8601
+        ):
+            return _ISODateTime(field, self.zone)
+        return field.to_representation
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """Returns a reader for serializer, or None if it has unsupported fields"""
+        try:
+            return cls(serializer)
+        except UnsupportedField:
+            return None
+
+    def values(self, queryset):
+        """
+        The rows to read, as a .values() queryset.
+
+        The queryset's ordering columns are selected as well, so a keyset
+        paginator can take its position from the rows.
+        """
+        pk_name = self.model._meta.pk.name
+        ordering = [
+            pk_name if name == 'pk' else name
+            for name in (
+                field.lstrip('-') for field in queryset.query.order_by or self.model._meta.ordering
+                if isinstance(field, str)
+            )
+        ]
+        annotations = [name for name in self.annotations if name in queryset.query.annotations]
+        names = dict.fromkeys([*self.columns, *annotations, *ordering])
+        return queryset.prefetch_related(None).values(*names)
+
+    def to_representation(self, rows):
+        """
+        Args:
+            rows: Dicts from values(), e.g. a page of them
+
+        Returns:
+            List of dicts, as serializer(many=True).data would return
+        """
+        self.zone[0] = timezone.get_current_timezone()
+        related = {
+            name: self._read_many(model_field, target, reader, [row[self.pk_column] for row in rows])
+            for name, model_field, target, reader in self.many
+        }
+        return [self._represent(row, related) for row in rows]
+
+    def _represent(self, row, related=None):
+        item = {}
+        for name, column, convert, child in self.fields:
+            if column is None:
+                item[name] = related[name].get(row[self.pk_column], [])
+                continue
+            if column not in row:
+                continue
+            value = row[column]
+            if value is None:
+                item[name] = None
+            elif child is not None:
+                item[name] = child._represent(row)
+            else:
+                item[name] = convert(value) if convert else value
+        return item
+
+    def _read_many(self, model_field, target, reader, ids):
+        """Related representations per id, in the related model's default ordering"""
+        source = model_field.m2m_field_name()
+        related = {}
+        for row in self._many_rows(model_field, target, reader, ids):
+            related.setdefault(row[source], []).append(reader._represent(row))
+        return related
+
+    def _many_rows(self, model_field, target, reader, ids):
+        if not ids:
+            return []
+        source = model_field.m2m_field_name()
+        ordering = [
+            f'-{target}__{field[1:]}' if field.startswith('-') else f'{target}__{field}'
+            for field in reader.model._meta.ordering
+        ]
+        return (
+            model_field.remote_field.through.objects
+            .filter(**{f'{source}__in': ids})
+            .order_by(*ordering)
+            .values(source, *reader.columns)
+        )
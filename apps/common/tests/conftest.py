@@ -0,0 +1,61 @@
+import pytest
+from rest_framework.test import APIClient
+from apps.interactions.models import Interaction
+from apps.notes.models import Note
+from apps.relationships.models import Relationship
+from apps.users.models import User
+
+NOTE_TEXTS = [
+    'Moving to Lisbon in the spring',
+    'Lisbon, Lisbon and more Lisbon: the whole call was about the move',
+    'Asked for a school recommendation in Lisbon',
+    'Training for the Berlin marathon',
+    'Prefers email over calls',
+    'Visiting Lisbon again for the Lisbon web summit',
+]
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    # Every request must build its response, not replay a cached one
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='ana', email='ana@example.com', password='secret')
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def crm_data(user):
+    """Relationships, interactions with participants and notes, several mentioning Lisbon"""
+    relationships = [
+        Relationship.objects.create(
+            user=user, name=f'Contact {i}', email=f'contact{i}@example.com' if i % 2 else None,
+        )
+        for i in range(5)
+    ]
+    for i in range(8):
+        interaction = Interaction.objects.create(
+            user=user,
+            interaction_type='CALL',
+            summary=NOTE_TEXTS[i % len(NOTE_TEXTS)],
+            transcription=f'Speaker 1: {NOTE_TEXTS[(i + 1) % len(NOTE_TEXTS)]}',
+        )
+        interaction.relationships.set(relationships[i % 3:i % 3 + i % 3])
+        for j, text in enumerate(NOTE_TEXTS):
+            Note.objects.create(
+                user=user,
+                relationship=relationships[(i + j) % len(relationships)],
+                interaction=interaction if j % 2 else None,
+                note_text=text,
+                importance_score=j % 3,
+            )
+    return relationships
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+import pytest
+from apps.common.pagination import KeysetPagination
+from apps.notes.models import Note
+from apps.relationships.models import Relationship
+
+
+def paginator(ordering):
+    paginator = KeysetPagination()
+    paginator.ordering = ordering
+    return paginator
+
+
+def collect_ids(client, url, link='next'):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        ids += [row['id'] for row in response.json()['results']]
+        url = response.json()[link]
+    return ids
+
+
+def test_ordering_gets_id_tiebreak_in_leading_direction():
+    assert KeysetPagination().get_ordering(Note.objects.order_by('-created_at')) == ['-created_at', '-id']
+    assert KeysetPagination().get_ordering(Note.objects.order_by('importance_score')) == ['importance_score', 'id']
+    assert KeysetPagination().get_ordering(Note.objects.order_by('-pk')) == ['-id']
+
+
+@pytest.mark.parametrize('url', [
+    '/api/notes/',
+    '/api/notes/?ordering=importance_score',
+    '/api/notes/?ordering=-importance_score',
+    '/api/interactions/',
+    '/api/relationships/',
+])
+def test_cursor_visits_every_row_once(api_client, crm_data, url):
+    separator = '&' if '?' in url else '?'
+    everything = api_client.get(f'{url}{separator}page_size=200').json()
+    expected = [row['id'] for row in everything['results']]
+    assert everything['next'] is None and everything['previous'] is None
+    assert 'count' not in everything
+
+    # importance_score repeats across rows, so pages split ties on the id
+    assert collect_ids(api_client, f'{url}{separator}page_size=3') == expected
+
+
+def test_previous_link_walks_back(api_client, crm_data):
+    expected = [row['id'] for row in api_client.get('/api/notes/?ordering=importance_score&page_size=200').json()['results']]
+
+    url = '/api/notes/?ordering=importance_score&page_size=4'
+    while True:
+        page = api_client.get(url).json()
+        if page['next'] is None:
+            break
+        url = page['next']
+    backwards = collect_ids(api_client, page['previous'], link='previous')
+
+    # Each page comes back in list order, the pages themselves last to first
+    pages = [expected[start:start + 4] for start in range(0, len(expected), 4)][:-1]
+    assert backwards == [note_id for page_ids in reversed(pages) for note_id in page_ids]
+
+
+def test_page_size_is_capped(api_client, crm_data, monkeypatch):
+    monkeypatch.setattr(KeysetPagination, 'max_page_size', 5)
+
+    response = api_client.get('/api/notes/?page_size=100000')
+
+    assert len(response.json()['results']) == 5
+
+
+@pytest.mark.parametrize('cursor', ['garbage', 'eyJwIjogWzFdfQ==', 'eyJwIjogWyJub3QtYS1kYXRlIiwgMV19'])
+def test_invalid_cursor_is_not_found(api_client, crm_data, cursor):
+    response = api_client.get(f'/api/notes/?cursor={cursor}')
+
+    assert response.status_code == 404
+
+
+def test_cursor_keeps_microseconds(api_client, user):
+    # Rows a microsecond apart must not be skipped or repeated
+    relationship = Relationship.objects.create(user=user, name='Contact')
+    base = datetime(2024, 6, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    for i in range(4):
+        note = Note.objects.create(user=user, relationship=relationship, note_text=f'Note {i}')
+        Note.objects.filter(pk=note.pk).update(created_at=base.replace(microsecond=base.microsecond + i // 2))
+    expected = [row['id'] for row in api_client.get('/api/notes/?page_size=200').json()['results']]
+
+    assert collect_ids(api_client, '/api/notes/?page_size=1') == expected
+
+
+def test_position_of_dict_row():
+    created_at = datetime(2024, 6, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    row = {'id': 3, 'search_rank': 0.0607927, 'created_at': created_at, 'note_text': 'Lisbon'}
+
+    position = paginator(['-search_rank', '-created_at', '-id']).position_of(row)
+
+    assert position == [0.0607927, created_at, 3]
+
+
+def test_position_of_dict_row_matches_instance(crm_data):
+    ordering = ['importance_score', '-created_at', '-id']
+    note = Note.objects.order_by('pk').first()
+    row = Note.objects.filter(pk=note.pk).values('id', 'importance_score', 'created_at').get()
+
+    assert paginator(ordering).position_of(row) == paginator(ordering).position_of(note)
+
+
+@pytest.mark.parametrize('fields', ['', '&fields=id,note_text'])
+def test_search_rank_cursor_visits_every_row_once(api_client, crm_data, fields):
+    everything = api_client.get(f'/api/notes/?search=lisbon&page_size=200{fields}').json()
+    expected = [note['id'] for note in everything['results']]
+    assert everything['next'] is None
+    assert len(expected) > 4
+
+    # Cursors carry the float search_rank taken from the .values() rows
+    assert collect_ids(api_client, f'/api/notes/?search=lisbon&page_size=2{fields}') == expected
@@ -0,0 +1,34 @@
+"""
+List responses leave out Meta.expandable_fields unless they are requested;
+detail responses always include them.
+"""
+import pytest
+
+LIST_DEFAULTS = [
+    ('/api/interactions/', {'transcription', 'summary'}),
+    ('/api/notes/', {'relationship_data'}),
+]
+
+
+@pytest.mark.parametrize('url, expandable', LIST_DEFAULTS)
+def test_list_omits_expandable_fields_by_default(api_client, crm_data, url, expandable):
+    results = api_client.get(url).json()['results']
+
+    assert results
+    assert all(not expandable & row.keys() for row in results)
+
+
+@pytest.mark.parametrize('url, expandable', LIST_DEFAULTS)
+def test_list_returns_expandable_fields_on_request(api_client, crm_data, url, expandable):
+    expanded = api_client.get(f'{url}?expand={",".join(sorted(expandable))}').json()['results']
+    named = api_client.get(f'{url}?fields=id,{",".join(sorted(expandable))}').json()['results']
+
+    assert all(expandable <= row.keys() for row in expanded)
+    assert all(row.keys() == {'id'} | expandable for row in named)
+
+
+@pytest.mark.parametrize('url, expandable', LIST_DEFAULTS)
+def test_detail_includes_expandable_fields(api_client, crm_data, url, expandable):
+    first = api_client.get(url).json()['results'][0]
+
+    assert expandable <= api_client.get(f'{url}{first["id"]}/').json().keys()
@@ -0,0 +1,73 @@
+"""
+List responses built from .values() rows (ValuesListMixin) must be
+byte-identical to the serializer path they replace.
+"""
+import pytest
+from apps.common.serializers import ValuesReader
+
+URLS = [
+    '/api/notes/?page_size=7',
+    '/api/notes/?page_size=7&expand=relationship_data',
+    '/api/notes/?page_size=7&fields=id,created_at,relationship&ordering=importance_score',
+    '/api/notes/?page_size=5&fields=id,relationship_data',
+    '/api/notes/?page_size=4&search=lisbon',
+    '/api/notes/?page_size=4&search=lisbon&fields=id,search_headline',
+    '/api/interactions/?page_size=3',
+    '/api/interactions/?page_size=3&expand=transcription&ordering=created_at',
+    '/api/interactions/?page_size=3&fields=id,relationships_data',
+    '/api/interactions/?page_size=2&search=lisbon',
+]
+
+
+def walk(client, url):
+    """Follow next links to the last page, then previous links back to the first"""
+    forward = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        forward.append(response.content)
+        last, url = url, response.json()['next']
+
+    backward = []
+    url = client.get(last).json()['previous']
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        backward.append(response.content)
+        url = response.json()['previous']
+    return forward, backward
+
+
+@pytest.fixture
+def serializer_path(monkeypatch):
+    """Make ValuesListMixin fall back to the serializer for every list"""
+    def disable():
+        monkeypatch.setattr(ValuesReader, 'for_serializer', staticmethod(lambda serializer: None))
+    return disable
+
+
+@pytest.fixture
+def reader_calls(monkeypatch):
+    calls = []
+    to_representation = ValuesReader.to_representation
+
+    def spy(self, rows):
+        calls.append(len(rows))
+        return to_representation(self, rows)
+
+    monkeypatch.setattr(ValuesReader, 'to_representation', spy)
+    return calls
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_values_path_matches_serializer(api_client, crm_data, serializer_path, reader_calls, url):
+    fast_forward, fast_backward = walk(api_client, url)
+    assert reader_calls, 'the list was not served from .values() rows'
+
+    serializer_path()
+    slow_forward, slow_backward = walk(api_client, url)
+
+    assert len(fast_forward) > 1
+    assert fast_forward == slow_forward
+    # Reverse cursors read the rows in the opposite order and flip them back
+    assert fast_backward == slow_backward
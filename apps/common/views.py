@@ -0,0 +1,156 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from apps.common.serializers import ValuesReader
+
+
+def _request_digest(*parts):
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin adding ETag/Last-Modified to list and retrieve responses.
+
+    Validators come from the user's data_version and data_modified_at, which
+    are loaded with the authenticated user, so a matching If-None-Match or
+    If-Modified-Since is answered with 304 before any CRM table is queried
+    or anything is serialized. The ETag also covers the request path, query
+    string and negotiated media type, as each of those changes the body.
+    """
+
+    def get_validators(self, request):
+        user = request.user
+        digest = _request_digest(request.get_full_path(), request.accepted_media_type)
+        etag = quote_etag(f'{user.data_version}-{digest}')
+        # Whole seconds, like the header: a float is always newer than If-Modified-Since
+        last_modified = int(user.data_modified_at.timestamp()) if user.data_modified_at else None
+        return etag, last_modified
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Validators are per user
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching the serialized data of cached_actions responses.
+
+    Keys include the user's data_version, which every write to their CRM data
+    bumps once all of its rows (counts included) are written, so a write
+    invalidates all of that user's entries at once and a stale entry is never
+    served; superseded entries expire after API_CACHE_TTL_SECONDS. Hits skip
+    the database and the serializer. A response is only stored if the version
+    did not move while it was built, so data read half-way through a write is
+    never kept.
+    """
+
+    cached_actions = ('list', 'retrieve')
+
+    def get_cache_key(self, request):
+        user = request.user
+        # Pagination links in the data are absolute URLs
+        digest = _request_digest(self.action, request.build_absolute_uri())
+        return f'api:{self.basename}:{user.pk}:{user.data_version}:{digest}'
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and self._version_unchanged(request.user):
+            cache.set(key, response.data, settings.API_CACHE_TTL_SECONDS)
+        return response
+
+    def _version_unchanged(self, user):
+        current = type(user).objects.filter(pk=user.pk).values_list('data_version', flat=True).first()
+        return current == user.data_version
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin for ?fields= and ?expand= (comma-separated field names).
+
+    List responses leave out the serializer's Meta.expandable_fields unless
+    they are requested, and reads only load the columns that are returned,
+    so heavy TextFields are never read from Postgres unless asked for.
+    The serializer must use DynamicFieldsMixin.
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def _query_list(self, param):
+        value = self.request.query_params.get(param) if self.request else None
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        # Writes validate and return the full representation
+        if self.request is not None and self.request.method == 'GET':
+            kwargs.setdefault('fields', self._query_list(self.fields_query_param))
+            kwargs.setdefault('expand', self._query_list(self.expand_query_param))
+            kwargs.setdefault('omit_expandable', self.action == 'list')
+        return super().get_serializer(*args, **kwargs)
+
+    def sparse_queryset(self, queryset):
+        """Load only what the GET response serializes"""
+        if self.request is None or self.request.method != 'GET':
+            return queryset
+
+        # Ordering and pagination keys are read from every row too
+        ordering = {field.lstrip('-') for field in self.ordering or ()}
+        ordering.update(name for name in getattr(self, 'ordering_fields', ()) if name != '__all__')
+        return self.get_serializer().optimize_queryset(queryset, extra_columns=ordering)
+
+
+class ValuesListMixin:
+    """
+    ViewSet mixin serving list responses from .values() rows.
+
+    The list serializer is only used to decide what to return: rows are read
+    as dicts and turned into the same output by a ValuesReader, without
+    building model instances or running the serializer per row. Serializers
+    with fields the reader does not support fall back to the normal list.
+    """
+
+    def list(self, request, *args, **kwargs):
+        reader = ValuesReader.for_serializer(self.get_serializer())
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.to_representation(page))
+        return Response(reader.to_representation(queryset))
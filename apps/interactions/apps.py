@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InteractionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.interactions'
+
+    def ready(self):
+        # Keep the denormalised counters on related rows in sync
+        from . import signals  # noqa: F401
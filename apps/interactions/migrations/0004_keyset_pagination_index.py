@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0003_initial'),
+        ('relationships', '0003_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['user', '-interaction_date', '-id'], name='interactions_user_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0004_keyset_pagination_index'),
+        ('notes', '0004_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interaction',
+            name='active_notes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE interactions SET active_notes_count = ("
+                "SELECT COUNT(*) FROM notes WHERE notes.interaction_id = interactions.id AND notes.status = 'ACTIVE')",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0005_denormalised_counts'),
+        ('relationships', '0004_denormalised_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interaction',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('summary', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('transcription', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='interactions_search_gin'),
+        ),
+    ]
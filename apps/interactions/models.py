@@ -1,8 +1,11 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from apps.common.models import CounterFieldsMixin
 
 
-class Interaction(models.Model):
+class Interaction(CounterFieldsMixin, models.Model):
     """
     Represents a call, meeting, or other interaction between the user and their relationships.
     """
@@ -57,6 +60,19 @@ class Interaction(models.Model):
         null=True,
         help_text='Path to stored audio file'
     )
+    # Full-text index of summary (weight A) and transcription (weight B), kept by Postgres
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('summary', weight='A', config='english')
+            + SearchVector('transcription', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Denormalised count, kept current by the notes signals;
+    # never written by save() (see CounterFieldsMixin)
+    active_notes_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('active_notes_count',)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -68,3 +84,8 @@ class Interaction(models.Model):
         verbose_name = 'Interaction'
         verbose_name_plural = 'Interactions'
         ordering = ['-interaction_date']
+        indexes = [
+            # Keyset pagination on the default ordering
+            models.Index(fields=['user', '-interaction_date', '-id'], name='interactions_user_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='interactions_search_gin'),
+        ]
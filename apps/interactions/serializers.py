@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from apps.common.serializers import DynamicFieldsMixin
 from .models import Interaction
 from apps.relationships.models import Relationship
 from apps.relationships.serializers import RelationshipSerializer
 
 
-class InteractionSerializer(serializers.ModelSerializer):
+class InteractionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Interaction model"""
     relationships_data = RelationshipSerializer(source='relationships', many=True, read_only=True)
     relationship_ids = serializers.PrimaryKeyRelatedField(
@@ -14,6 +15,8 @@ class InteractionSerializer(serializers.ModelSerializer):
         source='relationships',
         required=False
     )
+    # Only present on full-text search results
+    search_headline = serializers.CharField(read_only=True)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -29,9 +32,11 @@ class InteractionSerializer(serializers.ModelSerializer):
             'id', 'user', 'relationships_data', 'relationship_ids',
             'interaction_type', 'interaction_date', 'duration_minutes',
             'transcription', 'summary', 'video_path', 'audio_path',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'search_headline'
         )
         read_only_fields = ('id', 'user', 'interaction_date', 'created_at', 'updated_at')
+        # Left out of list responses unless requested with ?expand= or ?fields=
+        expandable_fields = ('transcription', 'summary')
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -43,10 +48,7 @@ class InteractionSerializer(serializers.ModelSerializer):
 
 class InteractionDetailSerializer(InteractionSerializer):
     """Detailed serializer with full transcription"""
-    notes_count = serializers.SerializerMethodField()
+    notes_count = serializers.IntegerField(source='active_notes_count', read_only=True)
 
     class Meta(InteractionSerializer.Meta):
         fields = InteractionSerializer.Meta.fields + ('notes_count',)
-
-    def get_notes_count(self, obj):
-        return obj.notes.filter(status='ACTIVE').count()
@@ -0,0 +1,69 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from apps.relationships.models import Relationship
+from apps.users.models import User
+from .models import Interaction
+
+Participation = Interaction.relationships.through
+
+
+def _adjust(relationship_ids, delta):
+    # F() updates are atomic, so concurrent writers never lose an increment
+    # (they run after the save has committed unless the caller wraps both in a
+    # transaction); counts that drifted (bulk updates) are clamped until
+    # rebuild_counters runs
+    if relationship_ids:
+        Relationship.objects.filter(pk__in=relationship_ids).update(
+            interactions_count=Greatest(F('interactions_count') + delta, 0)
+        )
+
+
+@receiver(m2m_changed, sender=Participation)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep Relationship.interactions_count in step with Interaction.relationships.
+    With reverse=True the change came from relationship.interactions, so
+    instance is a Relationship and pk_set holds interaction ids.
+    """
+    if action == 'post_add':
+        # pk_set only holds the links that were actually created
+        if reverse:
+            _adjust([instance.pk], len(pk_set))
+        else:
+            _adjust(pk_set, 1)
+
+    elif action in ('pre_remove', 'pre_clear'):
+        # Removing a link that does not exist changes nothing, so record
+        # the links that really go away before they are deleted
+        if reverse:
+            links = Participation.objects.filter(relationship_id=instance.pk)
+            if pk_set is not None:
+                links = links.filter(interaction_id__in=pk_set)
+        else:
+            links = Participation.objects.filter(interaction_id=instance.pk)
+            if pk_set is not None:
+                links = links.filter(relationship_id__in=pk_set)
+        instance._removed_links = list(links.values_list('relationship_id', flat=True))
+
+    elif action in ('post_remove', 'post_clear'):
+        removed = getattr(instance, '_removed_links', [])
+        if reverse and removed:
+            _adjust([instance.pk], -len(removed))
+        elif not reverse:
+            _adjust(removed, -1)
+        instance._removed_links = []
+
+    # Last, so a response built for the new version never has the old counts
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        User.bump_data_version(instance.user_id)
+
+
+@receiver(pre_delete, sender=Interaction)
+def interaction_deleted(sender, instance, **kwargs):
+    # The link rows are removed by cascade, which sends no m2m_changed
+    _adjust(
+        list(Participation.objects.filter(interaction_id=instance.pk).values_list('relationship_id', flat=True)),
+        -1,
+    )
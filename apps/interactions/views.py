@@ -1,24 +1,56 @@
-from rest_framework import viewsets, filters
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.common.export import export_response
+from apps.common.filters import FullTextSearchFilter
+from apps.common.pagination import KeysetPagination
+from apps.common.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
 from .models import Interaction
 from .serializers import InteractionSerializer, InteractionDetailSerializer
 
 
-class InteractionViewSet(viewsets.ModelViewSet):
+class InteractionViewSet(ConditionalGetMixin, ValuesListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for Interaction CRUD operations"""
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['interaction_type', 'interaction_date']
     search_fields = ['summary', 'transcription']
+    search_vector_field = 'search_vector'
+    search_headline_field = 'transcription'
     ordering_fields = ['interaction_date', 'created_at']
     ordering = ['-interaction_date']
+    export_columns = [
+        'id', 'interaction_type', 'interaction_date', 'duration_minutes', 'summary',
+        'transcription', 'relationship_ids', 'created_at', 'updated_at',
+    ]
 
     def get_queryset(self):
-        # Only show interactions for the current user
-        return Interaction.objects.filter(user=self.request.user).prefetch_related('relationships')
+        # Only show interactions for the current user, loading only the returned columns
+        queryset = Interaction.objects.filter(user=self.request.user).defer('search_vector')
+        return self.sparse_queryset(queryset)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return InteractionDetailSerializer
         return InteractionSerializer
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all of the user's interactions as NDJSON (default) or CSV (?type=csv).
+        Honours the list filters, search and ordering, without pagination.
+        """
+        participants = Interaction.relationships.through.objects.filter(
+            interaction_id=OuterRef('pk')
+        ).values('relationship_id')
+        queryset = self.filter_queryset(self.get_queryset()).annotate(relationship_ids=ArraySubquery(participants))
+
+        response = export_response(request, queryset, self.export_columns, 'interactions')
+        if response is None:
+            return Response({'type': 'Must be ndjson or csv.'}, status=status.HTTP_400_BAD_REQUEST)
+        return response
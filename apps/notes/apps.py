@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.notes'
+
+    def ready(self):
+        # Keep the denormalised counters on related rows in sync
+        from . import signals  # noqa: F401
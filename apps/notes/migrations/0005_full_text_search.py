@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0006_full_text_search'),
+        ('notes', '0004_keyset_pagination_index'),
+        ('relationships', '0004_denormalised_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('note_text', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='notes_search_gin'),
+        ),
+    ]
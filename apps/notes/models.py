@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 
 class Note(models.Model):
@@ -39,6 +41,12 @@ class Note(models.Model):
         default=5,
         help_text='Importance score (1-10), used for sorting/filtering'
     )
+    # Full-text index of note_text, kept by Postgres
+    search_vector = models.GeneratedField(
+        expression=SearchVector('note_text', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -51,6 +59,9 @@ class Note(models.Model):
         verbose_name_plural = 'Notes'
         ordering = ['-created_at']
         indexes = [
+            # Keyset pagination on the default ordering
+            models.Index(fields=['user', '-created_at', '-id'], name='notes_user_created_id_idx'),
             models.Index(fields=['relationship', 'status']),
             models.Index(fields=['user', 'status']),
+            GinIndex(fields=['search_vector'], name='notes_search_gin'),
         ]
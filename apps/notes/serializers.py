@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from apps.common.serializers import DynamicFieldsMixin
 from .models import Note
 from apps.relationships.models import Relationship
 from apps.relationships.serializers import RelationshipSerializer
 
 
-class NoteSerializer(serializers.ModelSerializer):
+class NoteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Note model"""
     relationship_data = RelationshipSerializer(source='relationship', read_only=True)
     relationship_id = serializers.PrimaryKeyRelatedField(
@@ -13,15 +14,19 @@ class NoteSerializer(serializers.ModelSerializer):
         source='relationship',
         required=False
     )
+    # Only present on full-text search results
+    search_headline = serializers.CharField(read_only=True)
 
     class Meta:
         model = Note
         fields = (
-            'id', 'user', 'relationship_data', 'relationship_id',
+            'id', 'user', 'relationship', 'relationship_data', 'relationship_id',
             'interaction', 'note_text', 'status', 'importance_score',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'search_headline'
         )
-        read_only_fields = ('id', 'user', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'user', 'relationship', 'created_at', 'updated_at')
+        # Left out of list responses unless requested with ?expand= or ?fields=
+        expandable_fields = ('relationship_data',)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -33,3 +38,18 @@ class NoteSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class NoteBulkSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk note request. Rows with an id update that note, the
+    others create one. Related ids are checked per batch by the view, not
+    with a query per row.
+    """
+    id = serializers.IntegerField(required=False)
+    relationship_id = serializers.IntegerField(required=False)
+    interaction_id = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Note
+        fields = ('id', 'relationship_id', 'interaction_id', 'note_text', 'status', 'importance_score')
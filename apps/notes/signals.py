@@ -0,0 +1,63 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.interactions.models import Interaction
+from apps.relationships.models import Relationship
+from apps.users.models import User
+from .models import Note
+
+
+def _counted_in(relationship_id, interaction_id, status):
+    """Rows whose active_notes_count includes a note in this state"""
+    if status != 'ACTIVE':
+        return None, None
+    return relationship_id, interaction_id
+
+
+def _adjust(relationship_id, interaction_id, delta):
+    # F() updates are atomic, so concurrent writers never lose an increment
+    # (they run after the save has committed unless the caller wraps both in a
+    # transaction); counts that drifted (bulk updates) are clamped until
+    # rebuild_counters runs
+    if relationship_id:
+        Relationship.objects.filter(pk=relationship_id).update(
+            active_notes_count=Greatest(F('active_notes_count') + delta, 0)
+        )
+    if interaction_id:
+        Interaction.objects.filter(pk=interaction_id).update(
+            active_notes_count=Greatest(F('active_notes_count') + delta, 0)
+        )
+
+
+@receiver(pre_save, sender=Note)
+def remember_counted_state(sender, instance, **kwargs):
+    # One indexed lookup per save; the old state decides which counts move
+    previous = None
+    if instance.pk and not instance._state.adding:
+        previous = Note.objects.filter(pk=instance.pk).values_list(
+            'relationship_id', 'interaction_id', 'status'
+        ).first()
+    instance._counted_before = _counted_in(*previous) if previous else (None, None)
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, **kwargs):
+    before = getattr(instance, '_counted_before', (None, None))
+    after = _counted_in(instance.relationship_id, instance.interaction_id, instance.status)
+
+    # Only rows whose count actually changes are touched
+    if before[0] != after[0]:
+        _adjust(before[0], None, -1)
+        _adjust(after[0], None, 1)
+    if before[1] != after[1]:
+        _adjust(None, before[1], -1)
+        _adjust(None, after[1], 1)
+    # Last, so a response built for the new version never has the old counts
+    User.bump_data_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    _adjust(*_counted_in(instance.relationship_id, instance.interaction_id, instance.status), -1)
+    User.bump_data_version(instance.user_id)
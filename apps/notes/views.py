@@ -1,20 +1,137 @@
-from rest_framework import viewsets, filters
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.common.bulk import iter_batches, request_rows, validate_batch
+from apps.common.export import export_response
+from apps.common.filters import FullTextSearchFilter
+from apps.common.pagination import KeysetPagination
+from apps.common.parsers import NDJSONParser
+from apps.common.views import CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
+from apps.interactions.models import Interaction
+from apps.relationships.counters import rebuild_counters
+from apps.relationships.models import Relationship
+from apps.users.models import User
 from .models import Note
-from .serializers import NoteSerializer
+from .serializers import NoteSerializer, NoteBulkSerializer
 
 
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for Note CRUD operations"""
     serializer_class = NoteSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    cached_actions = ('list',)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['relationship', 'status', 'importance_score', 'interaction']
     search_fields = ['note_text']
+    search_vector_field = 'search_vector'
+    search_headline_field = 'note_text'
     ordering_fields = ['created_at', 'importance_score']
     ordering = ['-created_at']
+    export_columns = [
+        'id', 'relationship_id', 'relationship__name', 'interaction_id', 'note_text',
+        'status', 'importance_score', 'created_at', 'updated_at',
+    ]
 
     def get_queryset(self):
-        # Only show notes for the current user
-        return Note.objects.filter(user=self.request.user).select_related('relationship', 'interaction')
+        # Only show notes for the current user, loading only the returned columns
+        queryset = Note.objects.filter(user=self.request.user).defer('search_vector')
+        return self.sparse_queryset(queryset)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all of the user's notes as NDJSON (default) or CSV (?type=csv).
+        Honours the list filters, search and ordering, without pagination.
+        """
+        response = export_response(request, self.filter_queryset(self.get_queryset()), self.export_columns, 'notes')
+        if response is None:
+            return Response({'type': 'Must be ndjson or csv.'}, status=status.HTTP_400_BAD_REQUEST)
+        return response
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create and update many notes in one request.
+        Takes a JSON array or NDJSON (application/x-ndjson). Rows with an id
+        update that note with the fields given; rows without one create a note
+        and need relationship_id and note_text. Invalid rows are reported by
+        index and skipped.
+        """
+        serializer = NoteBulkSerializer(partial=True, context=self.get_serializer_context())
+        processed, created, updated, errors = 0, 0, 0, []
+
+        for batch in iter_batches(request_rows(request)):
+            processed += len(batch)
+            valid = validate_batch(serializer, batch, errors)
+            with transaction.atomic():
+                batch_created, batch_updated = self._write_notes(request.user, valid, errors)
+            created += batch_created
+            updated += batch_updated
+
+        # Bulk writes skip the model signals that invalidate conditional GETs
+        if created or updated:
+            User.bump_data_version(request.user.id)
+        return Response({'processed': processed, 'created': created, 'updated': updated, 'errors': errors})
+
+    def _write_notes(self, user, rows, errors):
+        # Ownership of every referenced row, checked with one query per table
+        relationship_ids = set(Relationship.objects.filter(
+            user=user, pk__in={data['relationship_id'] for _, data in rows if 'relationship_id' in data}
+        ).values_list('id', flat=True))
+        interaction_ids = set(Interaction.objects.filter(
+            user=user, pk__in={data['interaction_id'] for _, data in rows if data.get('interaction_id')}
+        ).values_list('id', flat=True))
+        notes = Note.objects.filter(
+            user=user, pk__in={data['id'] for _, data in rows if 'id' in data}
+        ).defer('search_vector').in_bulk()
+
+        to_create, to_update, update_fields = [], [], {'updated_at'}
+        touched_relationships, touched_interactions = set(), set()
+        for index, data in rows:
+            row_errors = {}
+            if 'relationship_id' in data and data['relationship_id'] not in relationship_ids:
+                row_errors['relationship_id'] = ['Unknown relationship.']
+            if data.get('interaction_id') and data['interaction_id'] not in interaction_ids:
+                row_errors['interaction_id'] = ['Unknown interaction.']
+            if 'id' in data and data['id'] not in notes:
+                row_errors['id'] = ['Unknown note.']
+            if 'id' not in data:
+                for field in ('relationship_id', 'note_text'):
+                    if field not in data:
+                        row_errors.setdefault(field, ['This field is required.'])
+            if row_errors:
+                errors.append({'index': index, 'errors': row_errors})
+                continue
+
+            if 'id' in data:
+                note = notes[data.pop('id')]
+                touched_relationships.add(note.relationship_id)
+                touched_interactions.add(note.interaction_id)
+                for field, value in data.items():
+                    setattr(note, field, value)
+                # bulk_update does not run auto_now
+                note.updated_at = timezone.now()
+                update_fields.update(data)
+                to_update.append(note)
+            else:
+                note = Note(user=user, **data)
+                to_create.append(note)
+            touched_relationships.add(note.relationship_id)
+            touched_interactions.add(note.interaction_id)
+
+        Note.objects.bulk_create(to_create)
+        Note.objects.bulk_update(to_update, list(update_fields))
+
+        # Bulk writes skip the counter signals; recompute the rows they affect
+        if to_create or to_update:
+            rebuild_counters(
+                Relationship.objects.filter(pk__in=touched_relationships),
+                Interaction.objects.filter(pk__in=touched_interactions - {None}),
+            )
+        return len(to_create), len(to_update)
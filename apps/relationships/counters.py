@@ -0,0 +1,47 @@
+"""
+Recomputation of the denormalised counters on relationships and interactions.
+
+The notes/interactions signals keep the counters current row by row; writes
+that bypass signals (bulk_create, queryset.update) recompute the rows they
+touched with rebuild_counters instead.
+"""
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    """Correlated COUNT(*) subquery of queryset rows pointing at the outer row"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def rebuild_counters(relationships=None, interactions=None):
+    """
+    Recompute the counters of the given rows with one UPDATE per table.
+
+    Args:
+        relationships: Relationship queryset to rebuild, or None to skip
+        interactions: Interaction queryset to rebuild, or None to skip
+
+    Returns:
+        Tuple of (relationships updated, interactions updated)
+    """
+    from apps.interactions.models import Interaction
+    from apps.notes.models import Note
+
+    active_notes = Note.objects.filter(status='ACTIVE')
+    participation = Interaction.relationships.through.objects.all()
+
+    relationships_updated = interactions_updated = 0
+    with transaction.atomic():
+        if relationships is not None:
+            relationships_updated = relationships.update(
+                active_notes_count=_count(active_notes, 'relationship'),
+                interactions_count=_count(participation, 'relationship'),
+            )
+        if interactions is not None:
+            interactions_updated = interactions.update(
+                active_notes_count=_count(active_notes, 'interaction'),
+            )
+    return relationships_updated, interactions_updated
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.interactions.models import Interaction
+from apps.relationships.counters import rebuild_counters
+from apps.relationships.models import Relationship
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalised note and interaction counts on relationships '
+        'and interactions, e.g. after bulk updates that bypassed the signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild the counts of this user id')
+
+    def handle(self, *args, **options):
+        relationships = Relationship.objects.all()
+        interactions = Interaction.objects.all()
+        if options['user']:
+            relationships = relationships.filter(user_id=options['user'])
+            interactions = interactions.filter(user_id=options['user'])
+
+        # One UPDATE per table, in a single transaction
+        relationships_updated, interactions_updated = rebuild_counters(relationships, interactions)
+        # Counts are part of the API responses, so cached copies are stale
+        User.bump_data_version([options['user']] if options['user'] else User.objects.values('pk'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt counters for {relationships_updated} relationships '
+            f'and {interactions_updated} interactions'
+        ))
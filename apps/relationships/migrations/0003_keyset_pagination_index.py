@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationships', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='relationship',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='relationships_user_upd_id_idx'),
+        ),
+    ]
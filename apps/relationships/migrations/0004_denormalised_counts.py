@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationships', '0003_keyset_pagination_index'),
+        ('interactions', '0004_keyset_pagination_index'),
+        ('notes', '0004_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relationship',
+            name='active_notes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='relationship',
+            name='interactions_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE relationships SET "
+                "active_notes_count = (SELECT COUNT(*) FROM notes "
+                "WHERE notes.relationship_id = relationships.id AND notes.status = 'ACTIVE'), "
+                "interactions_count = (SELECT COUNT(*) FROM interactions_relationships "
+                "WHERE interactions_relationships.relationship_id = relationships.id)",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:49
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationships', '0004_denormalised_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='relationship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='relationships_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='relationship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='relationships_email_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='relationship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='relationships_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
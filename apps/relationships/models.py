@@ -1,8 +1,10 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from apps.common.models import CounterFieldsMixin
 
 
-class Relationship(models.Model):
+class Relationship(CounterFieldsMixin, models.Model):
     """
     Represents a person that the user has a relationship with.
     """
@@ -29,6 +31,11 @@ class Relationship(models.Model):
         default='OTHER'
     )
     notes_summary = models.TextField(blank=True, help_text='Summary of all notes')
+    # Denormalised counts, kept current by the notes/interactions signals;
+    # never written by save() (see CounterFieldsMixin)
+    active_notes_count = models.PositiveIntegerField(default=0, editable=False)
+    interactions_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('active_notes_count', 'interactions_count')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -40,4 +47,12 @@ class Relationship(models.Model):
         verbose_name = 'Relationship'
         verbose_name_plural = 'Relationships'
         ordering = ['-updated_at']
+        indexes = [
+            # Keyset pagination on the default ordering
+            models.Index(fields=['user', '-updated_at', '-id'], name='relationships_user_upd_id_idx'),
+            # Trigram indexes for fuzzy autocomplete; they also serve icontains search
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='relationships_name_trgm'),
+            GinIndex(fields=['email'], opclasses=['gin_trgm_ops'], name='relationships_email_trgm'),
+            GinIndex(fields=['phone_number'], opclasses=['gin_trgm_ops'], name='relationships_phone_trgm'),
+        ]
         unique_together = [['user', 'name', 'email']]
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Relationship
 
@@ -21,14 +22,41 @@ class RelationshipSerializer(serializers.ModelSerializer):
 
 class RelationshipDetailSerializer(RelationshipSerializer):
     """Detailed serializer with nested notes"""
-    notes_count = serializers.SerializerMethodField()
-    recent_interactions_count = serializers.SerializerMethodField()
+    # Denormalised counters, so listing these costs no extra queries
+    notes_count = serializers.IntegerField(source='active_notes_count', read_only=True)
+    recent_interactions_count = serializers.IntegerField(source='interactions_count', read_only=True)
 
     class Meta(RelationshipSerializer.Meta):
         fields = RelationshipSerializer.Meta.fields + ('notes_count', 'recent_interactions_count')
 
-    def get_notes_count(self, obj):
-        return obj.notes.filter(status='ACTIVE').count()
 
-    def get_recent_interactions_count(self, obj):
-        return obj.interactions.count()
+class RelationshipEnrollSerializer(RelationshipSerializer):
+    """Create a relationship from a provisional participant seen during a call"""
+    participant_id = serializers.CharField(write_only=True, max_length=32)
+    face_signatures_count = serializers.SerializerMethodField()
+
+    class Meta(RelationshipSerializer.Meta):
+        fields = RelationshipSerializer.Meta.fields + ('participant_id', 'face_signatures_count')
+
+    def get_face_signatures_count(self, obj):
+        return obj.face_signatures.count()
+
+    def create(self, validated_data):
+        from ai_pipeline.face_clustering import enroll_face_cluster
+        from ai_pipeline.signature_cache import warm_signature_cache
+
+        participant_id = validated_data.pop('participant_id')
+        user = self.context['request'].user
+
+        with transaction.atomic():
+            relationship = super().create(validated_data)
+            signatures = enroll_face_cluster(user.id, participant_id, relationship)
+            if signatures is None:
+                raise serializers.ValidationError(
+                    {'participant_id': 'Unknown or expired participant.'}
+                )
+
+        # Runs after the signature invalidation hooks, so the next frame
+        # is matched against a matrix that already includes this person
+        transaction.on_commit(lambda: warm_signature_cache(user.id))
+        return relationship
@@ -1,18 +1,37 @@
-from rest_framework import viewsets, filters
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.common.bulk import iter_batches, request_rows, validate_batch
+from apps.common.parsers import NDJSONParser
+from apps.common.pagination import KeysetPagination
+from apps.common.views import CachedResponseMixin, ConditionalGetMixin
+from apps.users.models import User
 from .models import Relationship
-from .serializers import RelationshipSerializer, RelationshipDetailSerializer
+from .serializers import RelationshipSerializer, RelationshipDetailSerializer, RelationshipEnrollSerializer
 
 
-class RelationshipViewSet(viewsets.ModelViewSet):
+class RelationshipViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet for Relationship CRUD operations"""
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['relationship_type']
     search_fields = ['name', 'email', 'phone_number']
     ordering_fields = ['name', 'created_at', 'updated_at']
     ordering = ['-updated_at']
+    autocomplete_fields = ('name', 'email', 'phone_number')
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+    # Columns overwritten when a bulk row matches an existing (user, name, email)
+    bulk_update_fields = ['phone_number', 'relationship_type', 'notes_summary', 'updated_at']
 
     def get_queryset(self):
         # Only show relationships for the current user
@@ -21,4 +40,105 @@ class RelationshipViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return RelationshipDetailSerializer
+        if self.action == 'enroll':
+            return RelationshipEnrollSerializer
         return RelationshipSerializer
+
+    @action(detail=False, methods=['post'])
+    def enroll(self, request):
+        """
+        Name an unknown call participant.
+        Creates the relationship and its face signatures from the pending face
+        identified by the participant_id sent in the new_participant event.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Fuzzy contact lookup for search-as-you-type.
+        Returns the closest matches for ?q= by trigram word similarity on name,
+        email and phone number, as plain id/name/type rows without pagination.
+        """
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            return Response({'results': []})
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.autocomplete_limit)), 1), self.autocomplete_max_limit)
+        except ValueError:
+            limit = self.autocomplete_limit
+
+        # term <% field: each branch is answered by that field's trigram GIN index,
+        # and prefixes of a word already score high on word similarity
+        matches = Q()
+        for field in self.autocomplete_fields:
+            matches |= Q(**{f'{field}__trigram_word_similar': term})
+
+        # NULL emails/phones are ignored by GREATEST
+        similarity = Greatest(*[TrigramWordSimilarity(term, field) for field in self.autocomplete_fields])
+        results = (
+            Relationship.objects.filter(user=request.user)
+            .filter(matches)
+            .annotate(similarity=similarity)
+            .order_by('-similarity', 'name')
+            .values('id', 'name', 'relationship_type')[:limit]
+        )
+        return Response({'results': list(results)})
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create or update many relationships in one request.
+        Takes a JSON array or NDJSON (application/x-ndjson) of relationship
+        objects. Rows are upserted on (name, email): an existing contact gets
+        the row's other fields. Invalid rows are reported by index and skipped.
+        """
+        serializer = RelationshipSerializer(context=self.get_serializer_context())
+        processed, upserted, errors = 0, 0, []
+
+        for batch in iter_batches(request_rows(request)):
+            processed += len(batch)
+            valid = validate_batch(serializer, batch, errors)
+
+            # Later rows win over earlier rows for the same contact
+            contacts = {}
+            for _, data in valid:
+                contacts[(data['name'], data.get('email'))] = Relationship(user=request.user, **data)
+
+            with transaction.atomic():
+                upserted += self._upsert_relationships(request.user, list(contacts.values()))
+
+        # Bulk writes skip the model signals that invalidate conditional GETs
+        if upserted:
+            User.bump_data_version(request.user.id)
+        return Response({'processed': processed, 'upserted': upserted, 'errors': errors})
+
+    def _upsert_relationships(self, user, relationships):
+        with_email = [relationship for relationship in relationships if relationship.email is not None]
+        Relationship.objects.bulk_create(
+            with_email,
+            update_conflicts=True,
+            unique_fields=['user', 'name', 'email'],
+            update_fields=self.bulk_update_fields,
+        )
+
+        # NULL emails never conflict in the unique constraint, so rows
+        # without one are matched on name explicitly
+        without_email = {relationship.name: relationship for relationship in relationships if relationship.email is None}
+        existing = Relationship.objects.filter(user=user, email__isnull=True, name__in=without_email).only('id', 'name')
+        to_update = []
+        for match in existing:
+            if match.name not in without_email:
+                continue
+            relationship = without_email.pop(match.name)
+            relationship.pk = match.pk
+            # bulk_update does not run auto_now
+            relationship.updated_at = timezone.now()
+            to_update.append(relationship)
+        Relationship.objects.bulk_update(to_update, self.bulk_update_fields)
+        Relationship.objects.bulk_create(list(without_email.values()))
+
+        return len(relationships)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SignaturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.signatures'
+
+    def ready(self):
+        # Keep the signature matching cache in sync with the database
+        from . import signals  # noqa: F401
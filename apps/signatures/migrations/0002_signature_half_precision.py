@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:35
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationships', '0002_initial'),
+        ('signatures', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facesignature',
+            name='embedding_half',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=128, editable=False, help_text='Half-precision copy of the embedding, used for matching', null=True),
+        ),
+        migrations.AddField(
+            model_name='voicesignature',
+            name='embedding_half',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=512, editable=False, help_text='Half-precision copy of the embedding, used for matching', null=True),
+        ),
+        # Backfill existing rows before building the indexes
+        migrations.RunSQL(
+            sql=[
+                'UPDATE face_signatures SET embedding_half = embedding::halfvec(128)',
+                'UPDATE voice_signatures SET embedding_half = embedding::halfvec(512)',
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='facesignature',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_half'], m=16, name='face_sig_embedding_half_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='voicesignature',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_half'], m=16, name='voice_sig_embedding_half_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:10
+
+import django.db.models.functions.comparison
+import pgvector.django.halfvec
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signatures', '0002_signature_half_precision'),
+    ]
+
+    operations = [
+        # Matching reads the column in bulk, never through the index
+        migrations.RemoveIndex(
+            model_name='facesignature',
+            name='face_sig_embedding_half_hnsw',
+        ),
+        migrations.RemoveIndex(
+            model_name='voicesignature',
+            name='voice_sig_embedding_half_hnsw',
+        ),
+        # A column cannot be altered into a generated one; dropping and adding
+        # it lets Postgres compute every row, existing ones included
+        migrations.RemoveField(
+            model_name='facesignature',
+            name='embedding_half',
+        ),
+        migrations.RemoveField(
+            model_name='voicesignature',
+            name='embedding_half',
+        ),
+        migrations.AddField(
+            model_name='facesignature',
+            name='embedding_half',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast('embedding', pgvector.django.halfvec.HalfVectorField(dimensions=128)), help_text='Half-precision copy of the embedding, kept in sync by the database', output_field=pgvector.django.halfvec.HalfVectorField(dimensions=128)),
+        ),
+        migrations.AddField(
+            model_name='voicesignature',
+            name='embedding_half',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast('embedding', pgvector.django.halfvec.HalfVectorField(dimensions=512)), help_text='Half-precision copy of the embedding, kept in sync by the database', output_field=pgvector.django.halfvec.HalfVectorField(dimensions=512)),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from pgvector.django import VectorField
+from django.db.models.functions import Cast
+from pgvector.django import HalfVectorField, VectorField
 
 
 class FaceSignature(models.Model):
@@ -22,6 +23,12 @@ class FaceSignature(models.Model):
         null=True,
         help_text='Path to the source image'
     )
+    embedding_half = models.GeneratedField(
+        expression=Cast('embedding', HalfVectorField(dimensions=128)),
+        output_field=HalfVectorField(dimensions=128),
+        db_persist=True,
+        help_text='Half-precision copy of the embedding, kept in sync by the database'
+    )
     confidence_score = models.FloatField(
         default=1.0,
         help_text='Confidence score of the face detection (0-1)'
@@ -62,6 +69,12 @@ class VoiceSignature(models.Model):
         null=True,
         help_text='Path to the source audio sample'
     )
+    embedding_half = models.GeneratedField(
+        expression=Cast('embedding', HalfVectorField(dimensions=512)),
+        output_field=HalfVectorField(dimensions=512),
+        db_persist=True,
+        help_text='Half-precision copy of the embedding, kept in sync by the database'
+    )
     confidence_score = models.FloatField(
         default=1.0,
         help_text='Confidence score of the voice detection (0-1)'
@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from ai_pipeline.signature_cache import invalidate_signatures
+from .models import FaceSignature, VoiceSignature
+
+SIGNATURE_MODELS = (FaceSignature, VoiceSignature)
+
+
+def _invalidate_on_commit(signature, kind, origin=None):
+    if not isinstance(origin, QuerySet):
+        user_id = signature.relationship.user_id
+        transaction.on_commit(lambda: invalidate_signatures(user_id, kind))
+        return
+
+    # A bulk delete sends post_delete for every row, all with the same origin:
+    # look each relationship's user up once and invalidate each user once
+    user_ids, invalidated = vars(origin).setdefault('_signature_invalidation', ({}, set()))
+    if signature.relationship_id not in user_ids:
+        user_ids[signature.relationship_id] = signature.relationship.user_id
+    user_id = user_ids[signature.relationship_id]
+    if user_id not in invalidated:
+        invalidated.add(user_id)
+        transaction.on_commit(lambda: invalidate_signatures(user_id, kind))
+
+
+def _cascaded(origin):
+    # Signatures only cascade from their relationship, which is being deleted
+    # too; relationship_deleted invalidates once for all of its rows
+    model = origin.model if hasattr(origin, 'model') else type(origin)
+    return origin is not None and model not in SIGNATURE_MODELS
+
+
+@receiver(post_save, sender=FaceSignature)
+@receiver(post_delete, sender=FaceSignature)
+def face_signature_changed(sender, instance, origin=None, **kwargs):
+    if not _cascaded(origin):
+        _invalidate_on_commit(instance, 'face', origin)
+
+
+@receiver(post_save, sender=VoiceSignature)
+@receiver(post_delete, sender=VoiceSignature)
+def voice_signature_changed(sender, instance, origin=None, **kwargs):
+    if not _cascaded(origin):
+        _invalidate_on_commit(instance, 'voice', origin)
+
+
+@receiver(post_delete, sender='relationships.Relationship')
+def relationship_deleted(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_signatures(user_id))
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -11,10 +13,28 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every change to the user's relationships, interactions and notes;
+    # the API derives ETag/Last-Modified from these without touching those tables
+    data_version = models.PositiveBigIntegerField(default=0, editable=False)
+    data_modified_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def bump_data_version(cls, user_ids):
+        """
+        Record a change to the CRM data of the given users. Call it after
+        every write the change makes, denormalised counts included: a
+        request that sees the new version must also see the new data.
+        """
+        if isinstance(user_ids, int):
+            user_ids = [user_ids]
+        cls.objects.filter(pk__in=user_ids).update(
+            data_version=F('data_version') + 1,
+            data_modified_at=timezone.now(),
+        )
+
     class Meta:
         db_table = 'users'
         verbose_name = 'User'
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.interactions.models import Interaction
+from apps.relationships.models import Relationship
+from .models import User
+
+# Notes and call participants also move the denormalised counts, so their
+# versions are bumped by the counter receivers in apps.notes.signals and
+# apps.interactions.signals, after the counts are written
+
+
+@receiver(post_save, sender=Relationship)
+@receiver(post_delete, sender=Relationship)
+@receiver(post_save, sender=Interaction)
+@receiver(post_delete, sender=Interaction)
+def crm_data_changed(sender, instance, **kwargs):
+    User.bump_data_version(instance.user_id)
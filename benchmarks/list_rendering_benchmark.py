@@ -0,0 +1,166 @@
+"""
+Time to turn rows into a JSON list response for the note and interaction list
+endpoints, per 1000 rows:
+
+    serializer + json      ModelSerializer on model instances, DRF JSONRenderer
+    serializer + orjson    the same data, rendered with ORJSONRenderer
+    values + orjson        ValuesReader on .values() rows, ORJSONRenderer
+
+Rows are built in memory (instances with their related objects attached, and
+the equivalent .values() dicts), so database time is left out on both sides
+and only the Python work is measured. Each path is checked to produce the
+same bytes as serializer + json.
+
+Usage:
+    python -m benchmarks.list_rendering_benchmark
+    python -m benchmarks.list_rendering_benchmark --rows 5000 --repeat 10
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from apps.common.renderers import ORJSONRenderer  # noqa: E402
+from apps.common.serializers import ValuesReader  # noqa: E402
+from apps.interactions.models import Interaction  # noqa: E402
+from apps.interactions.serializers import InteractionSerializer  # noqa: E402
+from apps.notes.models import Note  # noqa: E402
+from apps.notes.serializers import NoteSerializer  # noqa: E402
+from apps.relationships.models import Relationship  # noqa: E402
+
+START = datetime(2024, 6, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+NOTE_TEXT = 'Mentioned they are moving to Lisbon in the spring and looking for a school for their daughter.'
+PARTICIPANTS_PER_INTERACTION = 2
+
+
+def build_relationships(count):
+    return [
+        Relationship(
+            id=i + 1, user_id=1, name=f'Contact {i}', email=f'contact{i}@example.com' if i % 2 else None,
+            relationship_type='FRIEND', notes_summary='Met at a conference.',
+            created_at=START + timedelta(hours=i), updated_at=START + timedelta(hours=i, microseconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def build_notes(rows, relationships):
+    return [
+        Note(
+            id=i + 1, user_id=1, relationship=relationships[i % len(relationships)],
+            interaction_id=i // 3 + 1 if i % 3 else None, note_text=NOTE_TEXT, status='ACTIVE',
+            importance_score=i % 10, created_at=START + timedelta(minutes=i), updated_at=START + timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+
+def build_interactions(rows, relationships):
+    interactions = []
+    for i in range(rows):
+        interaction = Interaction(
+            id=i + 1, user_id=1, interaction_type='CALL', interaction_date=START + timedelta(hours=i),
+            duration_minutes=30, transcription='', summary=NOTE_TEXT,
+            created_at=START + timedelta(hours=i), updated_at=START + timedelta(hours=i),
+        )
+        # As prefetch_related('relationships') leaves it
+        participants = Relationship.objects.none()
+        participants._result_cache = [
+            relationships[(i + j) % len(relationships)] for j in range(PARTICIPANTS_PER_INTERACTION)
+        ]
+        participants._prefetch_done = True
+        interaction._prefetched_objects_cache = {'relationships': participants}
+        interactions.append(interaction)
+    return interactions
+
+
+def values_row(instance, columns):
+    """The dict .values(*columns) returns for instance"""
+    row = {}
+    for column in columns:
+        value = instance
+        parts = column.split('__')
+        for depth, name in enumerate(parts):
+            field = value._meta.get_field(name)
+            # values() reads a foreign key as the related primary key
+            value = getattr(value, field.attname if depth == len(parts) - 1 else name)
+            if value is None:
+                break
+        row[column] = value
+    return row
+
+
+def participant_rows(interactions, reader):
+    """The rows of the extra participants query, for every interaction"""
+    _, model_field, target, child = reader.many[0]
+    source = model_field.m2m_field_name()
+    prefix = f'{target}__'
+    columns = [column.removeprefix(prefix) for column in child.columns]
+    rows = []
+    for interaction in interactions:
+        for relationship in interaction.relationships.all():
+            row = values_row(relationship, columns)
+            rows.append({source: interaction.id, **{prefix + column: value for column, value in row.items()}})
+    return rows
+
+
+def bench(label, serializer_class, kwargs, instances, repeat):
+    reader = ValuesReader.for_serializer(serializer_class(**kwargs))
+    assert reader is not None, f'{label}: not supported by ValuesReader'
+    rows = [values_row(instance, reader.columns) for instance in instances]
+    if reader.many:
+        # The participants query is database time; hand the reader its rows
+        related = participant_rows(instances, reader)
+        reader._many_rows = lambda *args: related
+
+    def serializer_json():
+        return JSONRenderer().render(serializer_class(instances, many=True, **kwargs).data)
+
+    def serializer_orjson():
+        return ORJSONRenderer().render(serializer_class(instances, many=True, **kwargs).data)
+
+    def values_orjson():
+        return ORJSONRenderer().render(reader.to_representation(rows))
+
+    expected = serializer_json()
+    print(f'\n{label}: {len(instances)} rows, {len(expected) / len(instances):,.0f} bytes/row')
+    print(f'{"path":<22} {"ms/1k rows":>11} {"speedup":>8}')
+    baseline = None
+    for name, run in (
+        ('serializer + json', serializer_json),
+        ('serializer + orjson', serializer_orjson),
+        ('values + orjson', values_orjson),
+    ):
+        assert run() == expected, f'{label}: {name} output differs'
+        per_1k_ms = min(timeit.repeat(run, number=1, repeat=repeat)) / len(instances) * 1000 * 1000
+        baseline = baseline or per_1k_ms
+        print(f'{name:<22} {per_1k_ms:>11.2f} {baseline / per_1k_ms:>7.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5, help='Report the best of this many runs')
+    args = parser.parse_args()
+
+    relationships = build_relationships(50)
+    notes = build_notes(args.rows, relationships)
+    interactions = build_interactions(args.rows, relationships)
+
+    # As the list endpoints construct them
+    bench('notes', NoteSerializer, {'omit_expandable': True}, notes, args.repeat)
+    bench('notes ?expand=relationship_data', NoteSerializer,
+          {'omit_expandable': True, 'expand': ['relationship_data']}, notes, args.repeat)
+    bench('interactions', InteractionSerializer, {'omit_expandable': True}, interactions, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Matching accuracy vs memory for float32, float16 and int8 signature matrices.
+
+Builds a synthetic gallery (several signatures per identity) and probes that
+are either a new noisy sample of an enrolled identity or an impostor, then
+matches them at the face and voice thresholds with each precision. Reported
+per precision:
+
+    bytes       size of the in-memory (and Redis) matrix
+    recall      probes of enrolled identities matched to the right one
+    false acc.  impostor probes matched to anyone
+    agree       decisions identical to float32
+    max err     largest absolute similarity error vs float32
+
+Usage:
+    python -m benchmarks.quantization_benchmark
+    python -m benchmarks.quantization_benchmark --identities 2000 --noise 0.5
+"""
+import argparse
+import os
+
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from ai_pipeline.config import AIConfig  # noqa: E402
+from ai_pipeline.quantization import PRECISIONS  # noqa: E402
+from ai_pipeline.signature_cache import SignatureMatrix  # noqa: E402
+
+SIGNATURES_PER_IDENTITY = 4
+
+
+def build_dataset(rng, identities, dimensions, noise, probes):
+    """Return gallery ids/embeddings and probe embeddings with their true ids"""
+    centers = rng.normal(size=(identities, dimensions))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    def samples(ids):
+        # Noise is scaled so that `noise` is the expected norm of the perturbation
+        return centers[ids] + rng.normal(scale=noise / np.sqrt(dimensions), size=(len(ids), dimensions))
+
+    gallery_ids = np.repeat(np.arange(identities), SIGNATURES_PER_IDENTITY)
+    gallery = samples(gallery_ids)
+
+    genuine_ids = rng.integers(0, identities, probes)
+    impostors = rng.normal(size=(probes, dimensions))
+    queries = np.vstack([samples(genuine_ids), impostors])
+    truth = np.concatenate([genuine_ids, np.full(probes, -1)])
+    return gallery_ids, gallery, queries, truth
+
+
+def evaluate(label, dimensions, threshold, args):
+    rng = np.random.default_rng(0)
+    # By default genuine pairs score right around the threshold, the region
+    # where rounding errors could flip a decision
+    noise = args.noise if args.noise is not None else np.sqrt(1 / threshold - 1)
+    gallery_ids, gallery, queries, truth = build_dataset(
+        rng, args.identities, dimensions, noise, args.probes
+    )
+
+    print(f'\n{label}: {args.identities} identities x {SIGNATURES_PER_IDENTITY} signatures, '
+          f'{dimensions} dims, threshold {threshold}, noise {noise:.2f}')
+    print(f'{"precision":<10} {"bytes":>10} {"recall":>8} {"false acc.":>11} {"agree":>8} {"max err":>9}')
+
+    reference = None
+    for precision in PRECISIONS:
+        matrix = SignatureMatrix(0, gallery_ids, gallery, dimensions, precision)
+        matches = matrix.match(queries, threshold)
+        decided = np.array([-1 if relationship_id is None else relationship_id for relationship_id, _ in matches])
+        scores = np.array([similarity for _, similarity in matches])
+        if reference is None:
+            reference = (decided, scores)
+
+        genuine = truth >= 0
+        recall = np.mean(decided[genuine] == truth[genuine])
+        false_accept = np.mean(decided[~genuine] >= 0)
+        agree = np.mean(decided == reference[0])
+        max_error = np.abs(scores - reference[1]).max()
+        print(f'{precision:<10} {matrix.nbytes:>10,} {recall:>8.4f} {false_accept:>11.4f} {agree:>8.4f} {max_error:>9.2e}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--identities', type=int, default=500)
+    parser.add_argument('--probes', type=int, default=5000)
+    parser.add_argument('--noise', type=float, help='Norm of the per-sample noise (default: puts genuine pairs at the threshold)')
+    args = parser.parse_args()
+
+    evaluate('face', AIConfig.FACE_EMBEDDING_DIMENSIONS, AIConfig.FACE_MATCH_THRESHOLD, args)
+    evaluate('voice', AIConfig.VOICE_EMBEDDING_DIMENSIONS, AIConfig.VOICE_MATCH_THRESHOLD, args)
+
+
+if __name__ == '__main__':
+    main()
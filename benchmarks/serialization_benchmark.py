@@ -0,0 +1,76 @@
+"""
+Payload size and encode/decode time for JSON vs msgpack_numpy on the message
+shapes the AI pipeline actually sends.
+
+Usage:
+    python -m benchmarks.serialization_benchmark
+"""
+import json
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+
+from celery_app.serialization import dumps, loads, to_jsonable
+
+ITERATIONS = 5000
+
+
+def build_messages():
+    rng = np.random.default_rng(0)
+    embedding = rng.normal(size=128)  # face_recognition returns float64
+    now = datetime.now(timezone.utc).isoformat()
+    note_text = 'Mentioned they are moving to Lisbon in the spring and looking for a school for their daughter. ' * 2
+
+    return {
+        'new_participant event': {
+            'type': 'new_participant',
+            'participant': {'face_embedding': embedding, 'timestamp': 1718000000123},
+        },
+        'participant_identified event': {
+            'type': 'participant_identified',
+            'participant': {'id': 42, 'name': 'Ana Souza', 'relationship_type': 'FRIEND'},
+            'notes': [
+                {'id': 1000 + i, 'text': note_text, 'importance': 7, 'created_at': now}
+                for i in range(5)
+            ],
+        },
+        'note_generated event': {
+            'type': 'note_generated',
+            'note': {'id': 1234, 'relationship_id': 42, 'text': note_text, 'importance': 8},
+        },
+        'process_video_chunk task': (
+            [], {'user_id': '7', 'frame_ref': 'local:' + 'a' * 32, 'timestamp': 1718000000123},
+            {'callbacks': None, 'errbacks': None, 'chain': None, 'chord': None},
+        ),
+        'identify_participants task (4 faces)': (
+            ['7', [rng.normal(size=128) for _ in range(4)]], {},
+            {'callbacks': None, 'errbacks': None, 'chain': None, 'chord': None},
+        ),
+    }
+
+
+def bench(label, message):
+    # JSON needs embeddings converted to lists first, exactly as the tasks used to do
+    json_message = to_jsonable(message)
+    json_payload = json.dumps(json_message).encode('utf-8')
+    msgpack_payload = dumps(message)
+
+    json_encode = timeit.timeit(lambda: json.dumps(to_jsonable(message)).encode('utf-8'), number=ITERATIONS)
+    json_decode = timeit.timeit(lambda: json.loads(json_payload), number=ITERATIONS)
+    msgpack_encode = timeit.timeit(lambda: dumps(message), number=ITERATIONS)
+    msgpack_decode = timeit.timeit(lambda: loads(msgpack_payload), number=ITERATIONS)
+
+    per_call = 1e6 / ITERATIONS
+    print(f'{label:<38} {"json":<14} {len(json_payload):>7} B {json_encode * per_call:>8.1f} us {json_decode * per_call:>8.1f} us')
+    print(f'{"":<38} {"msgpack_numpy":<14} {len(msgpack_payload):>7} B {msgpack_encode * per_call:>8.1f} us {msgpack_decode * per_call:>8.1f} us')
+
+
+def main():
+    print(f'{"message":<38} {"serializer":<14} {"size":>9} {"encode":>11} {"decode":>11}')
+    for label, message in build_messages().items():
+        bench(label, message)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Frames per second per core: single-frame processing vs micro-batching.
+
+Runs the detection/encoding/matching path of process_video_chunk (one frame at
+a time, signatures scored per frame) against process_video_batch (decode all,
+detect across the batch, one vectorised scoring pass per user). Broker and
+channel-layer traffic are excluded so only the per-core compute is compared.
+
+Usage:
+    OMP_NUM_THREADS=1 python -m benchmarks.video_batch_benchmark --frames path/to/jpegs
+    python -m benchmarks.video_batch_benchmark --synthetic 64
+"""
+import argparse
+import io
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from PIL import Image  # noqa: E402
+from scipy.spatial.distance import cosine  # noqa: E402
+from ai_pipeline.config import AIConfig  # noqa: E402
+from ai_pipeline.signature_cache import SignatureMatrix  # noqa: E402
+from ai_pipeline.video_processor import (  # noqa: E402
+    extract_faces_from_frame, extract_faces_from_frames, load_frame,
+)
+
+USERS = 8
+SIGNATURES_PER_USER = 500
+
+
+def load_frames(args):
+    if args.frames:
+        paths = sorted(p for p in Path(args.frames).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+        return [path.read_bytes() for path in paths]
+
+    # Synthetic frames contain no faces, so only decode + detection is measured
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(args.synthetic):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)).save(buffer, format='JPEG')
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def build_signatures():
+    rng = np.random.default_rng(1)
+    return {
+        user_id: SignatureMatrix(
+            0,
+            np.arange(SIGNATURES_PER_USER),
+            rng.normal(size=(SIGNATURES_PER_USER, AIConfig.FACE_EMBEDDING_DIMENSIONS)),
+            AIConfig.FACE_EMBEDDING_DIMENSIONS,
+        )
+        for user_id in range(USERS)
+    }
+
+
+def run_legacy(frames, signatures):
+    """The original path: per-frame detection, per-signature Python loop"""
+    for index, frame in enumerate(frames):
+        matrix = signatures[index % USERS]
+        for face in extract_faces_from_frame(frame):
+            best = 0
+            for stored in matrix.embeddings:
+                similarity = 1 - cosine(face['embedding'], stored)
+                if similarity > best and similarity >= AIConfig.FACE_MATCH_THRESHOLD:
+                    best = similarity
+
+
+def run_single(frames, signatures):
+    """process_video_chunk: one frame per task, vectorised scoring per frame"""
+    for index, frame in enumerate(frames):
+        faces = extract_faces_from_frame(frame)
+        if faces:
+            signatures[index % USERS].match(
+                np.stack([face['embedding'] for face in faces]), AIConfig.FACE_MATCH_THRESHOLD
+            )
+
+
+def run_batched(frames, signatures, batch_size):
+    """process_video_batch: batch decode/detect, one scoring pass per user"""
+    for start in range(0, len(frames), batch_size):
+        batch = frames[start:start + batch_size]
+        faces_per_frame = extract_faces_from_frames([load_frame(frame) for frame in batch])
+
+        faces_by_user = {}
+        for offset, faces in enumerate(faces_per_frame):
+            faces_by_user.setdefault((start + offset) % USERS, []).extend(face['embedding'] for face in faces)
+        for user_id, embeddings in faces_by_user.items():
+            signatures[user_id].match(np.stack(embeddings), AIConfig.FACE_MATCH_THRESHOLD)
+
+
+def measure(label, func, frames, *args):
+    started = time.process_time()
+    func(frames, *args)
+    elapsed = time.process_time() - started
+    print(f'{label:<28} {len(frames) / elapsed:>8.1f} frames/s/core  ({elapsed:.2f}s CPU)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', help='Directory of JPEG/PNG frames containing faces')
+    parser.add_argument('--synthetic', type=int, default=64, help='Number of synthetic frames if --frames is omitted')
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    signatures = build_signatures()
+    print(f'{len(frames)} frames, {USERS} users x {SIGNATURES_PER_USER} signatures, model={AIConfig.FACE_RECOGNITION_MODEL}')
+
+    measure('legacy (per-signature loop)', run_legacy, frames, signatures)
+    measure('single-frame task', run_single, frames, signatures)
+    measure(f'batched (size {args.batch_size})', run_batched, frames, signatures, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Claim-check blob store for media payloads handed to Celery tasks.
+
+Video frames and audio chunks are written once by the WebSocket consumer and
+only a short reference (e.g. ``local:3f2a...``) travels through the broker.
+Workers resolve the reference back into the payload and delete it when done.
+"""
+import mmap
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+
+_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class BlobNotFound(KeyError):
+    """The referenced blob expired or was already consumed."""
+
+
+class BlobStore:
+    """Base class for blob store backends"""
+
+    scheme = None
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    def put(self, data):
+        """Store bytes and return a reference string"""
+        raise NotImplementedError
+
+    def get(self, ref):
+        """Return a bytes-like, file-like object for the blob"""
+        raise NotImplementedError
+
+    def delete(self, ref):
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """Remove blobs older than the TTL. Returns the number removed."""
+        return 0
+
+    def _new_ref(self):
+        return f'{self.scheme}:{uuid.uuid4().hex}'
+
+    def _key(self, ref):
+        scheme, _, key = ref.partition(':')
+        if scheme != self.scheme or not _KEY_RE.match(key):
+            raise ValueError(f"Invalid blob reference for '{self.scheme}' store: {ref!r}")
+        return key
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores blobs as files in a directory shared by producers and workers.
+    Point BLOB_STORE_DIR at a tmpfs such as /dev/shm for shared-memory speed.
+    Reads are memory-mapped, so the payload is never copied into the worker.
+    """
+
+    scheme = 'local'
+
+    def __init__(self, directory, ttl):
+        super().__init__(ttl)
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, ref):
+        return os.path.join(self.directory, self._key(ref))
+
+    def put(self, data):
+        ref = self._new_ref()
+        path = self._path(ref)
+        # Write to a temp name and rename so readers never see a partial blob
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as blob_file:
+            blob_file.write(data)
+        os.replace(temp_path, path)
+        return ref
+
+    def get(self, ref):
+        try:
+            with open(self._path(ref), 'rb') as blob_file:
+                if os.fstat(blob_file.fileno()).st_size == 0:
+                    return _BytesBlob(b'')
+                return mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise BlobNotFound(ref)
+
+    def delete(self, ref):
+        try:
+            os.unlink(self._path(ref))
+        except FileNotFoundError:
+            pass
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Consumed by a worker while we were scanning
+                    continue
+        return removed
+
+
+class RedisBlobStore(BlobStore):
+    """Stores blobs in Redis with a TTL, for workers on other hosts"""
+
+    scheme = 'redis'
+    key_prefix = 'blob:'
+
+    def __init__(self, url, ttl):
+        super().__init__(ttl)
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def put(self, data):
+        ref = self._new_ref()
+        self.client.set(self.key_prefix + self._key(ref), data, ex=self.ttl)
+        return ref
+
+    def get(self, ref):
+        data = self.client.get(self.key_prefix + self._key(ref))
+        if data is None:
+            raise BlobNotFound(ref)
+        return _BytesBlob(data)
+
+    def delete(self, ref):
+        self.client.delete(self.key_prefix + self._key(ref))
+
+
+class _BytesBlob(bytes):
+    """bytes with the subset of the file API that PIL and callers need"""
+
+    def __new__(cls, data):
+        blob = super().__new__(cls, data)
+        blob._pos = 0
+        return blob
+
+    def read(self, size=-1):
+        end = len(self) if size is None or size < 0 else self._pos + size
+        chunk = bytes(self[self._pos:end])
+        self._pos += len(chunk)
+        return chunk
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self)}[whence]
+        self._pos = base + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        pass
+
+
+_store = None
+
+
+def get_blob_store():
+    """Return the process-wide blob store configured in settings"""
+    global _store
+    if _store is None:
+        backend = settings.BLOB_STORE_BACKEND
+        if backend == 'local':
+            _store = LocalBlobStore(settings.BLOB_STORE_DIR, settings.BLOB_STORE_TTL_SECONDS)
+        elif backend == 'redis':
+            _store = RedisBlobStore(settings.REDIS_URL, settings.BLOB_STORE_TTL_SECONDS)
+        else:
+            raise ValueError(f"Unknown BLOB_STORE_BACKEND: {backend!r}")
+    return _store
+
+
+def put_blob(data):
+    """Store a payload and return its claim-check reference"""
+    return get_blob_store().put(data)
+
+
+@contextmanager
+def open_blob(ref):
+    """
+    Open a blob for reading. The yielded object supports both the buffer
+    protocol and read()/seek(), and is only valid inside the block.
+    """
+    blob = get_blob_store().get(ref)
+    try:
+        yield blob
+    finally:
+        blob.close()
+
+
+def delete_blob(ref):
+    get_blob_store().delete(ref)
@@ -1,10 +1,36 @@
 import os
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
+from .serialization import register_kombu_serializer
+from . import publisher
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-app = Celery('crm_backend')
+# Make the msgpack serializer available before any message is sent or received
+register_kombu_serializer()
+
+
+class QueueSerializerTask(Task):
+    """
+    Task base class that applies per-queue serializer overrides
+    (settings.CELERY_QUEUE_SERIALIZERS) when a task is published.
+    """
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        queue_serializers = getattr(settings, 'CELERY_QUEUE_SERIALIZERS', {})
+        if queue_serializers and 'serializer' not in options:
+            queue = options.get('queue') or self.app.amqp.router.route(
+                {}, self.name, args, kwargs
+            ).get('queue')
+            queue_name = getattr(queue, 'name', queue)
+            if queue_name in queue_serializers:
+                options['serializer'] = queue_serializers[queue_name]
+        return super().apply_async(args, kwargs, **options)
+
+
+app = Celery('crm_backend', task_cls=QueueSerializerTask)
 
 # Load configuration from Django settings
 app.config_from_object('django.conf:settings', namespace='CELERY')
@@ -13,6 +39,17 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@worker_process_init.connect
+def start_publisher(**kwargs):
+    # One event loop and channel-layer connection per worker process
+    publisher.get_publisher()
+
+
+@worker_process_shutdown.connect
+def flush_publisher(**kwargs):
+    publisher.flush()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,72 @@
+"""
+Queue lag of video frames, measured on one clock.
+
+Web and worker hosts' clocks are not guaranteed to agree, so a frame's age is
+never computed from two local clocks. Both sides read redis_time() instead:
+Redis server time, estimated from the local monotonic clock and an offset
+re-measured with the Redis TIME command every CLOCK_SYNC_SECONDS. A frame is
+stamped with it when the consumer queues it, and its lag is redis_time() on
+the worker minus that stamp, whatever the backlog or the host.
+
+Lag is reported to the consumer only when it moves to another bucket of
+VIDEO_LAG_REPORT_BUCKET_MS, or every VIDEO_LAG_REPORT_EVERY frames, instead
+of once per frame.
+"""
+import time
+from collections import OrderedDict
+
+# How often each process re-measures its offset to the Redis clock
+CLOCK_SYNC_SECONDS = 60
+
+# Calls tracked by one worker process
+MAX_TRACKED_CALLS = 1024
+
+# (offset from time.monotonic() to Redis time, monotonic time it was measured)
+_clock = None
+
+
+def redis_time():
+    """Current Redis server time in seconds since the epoch"""
+    global _clock
+    now = time.monotonic()
+    if _clock is None or now - _clock[1] > CLOCK_SYNC_SECONDS:
+        from ai_pipeline.redis_client import get_redis
+
+        before = time.monotonic()
+        seconds, microseconds = get_redis().time()
+        after = time.monotonic()
+        # The server read its clock about halfway through the round trip
+        _clock = (seconds + microseconds / 1e6 - (before + after) / 2, after)
+        now = after
+    return now + _clock[0]
+
+
+class FrameLagTracker:
+    """Report decisions for the frames of each call seen by one worker process"""
+
+    def __init__(self, bucket_seconds, report_every):
+        self.bucket_seconds = bucket_seconds
+        self.report_every = report_every
+        # user_id -> [last reported bucket, frames since report]
+        self._calls = OrderedDict()
+
+    def observe(self, user_id, lag):
+        """
+        Record the lag of one frame of a call.
+
+        Returns:
+            True if the lag should be reported to the consumer
+        """
+        state = self._calls.get(user_id)
+        if state is None:
+            state = self._calls[user_id] = [None, 0]
+        self._calls.move_to_end(user_id)
+        while len(self._calls) > MAX_TRACKED_CALLS:
+            self._calls.popitem(last=False)
+
+        bucket = int(lag // self.bucket_seconds)
+        state[1] += 1
+        report = bucket != state[0] or state[1] >= self.report_every
+        if report:
+            state[0], state[1] = bucket, 0
+        return report
@@ -0,0 +1,114 @@
+"""
+Per-process channel-layer publisher for Celery workers.
+
+Calling async_to_sync(channel_layer.group_send) from a task sets up an event
+loop and Redis round trip for every message. Instead, each worker process owns
+one background thread running a persistent event loop (and therefore one
+persistent channel-layer connection pool). Tasks hand events over with
+publish(), which only schedules a callback on that loop.
+
+Events for the same group that arrive within COALESCE_WINDOW are sent as a
+single 'event_batch' message, which CallConsumer.event_batch unpacks, and
+different groups are flushed concurrently over the shared connections.
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from channels.layers import get_channel_layer
+
+# Seconds to wait for more events bound for the same group
+COALESCE_WINDOW = 0.005
+
+
+class GroupPublisher:
+    """Coalescing group_send publisher with its own event loop thread"""
+
+    def __init__(self, coalesce_window=COALESCE_WINDOW):
+        self.coalesce_window = coalesce_window
+        self._loop = asyncio.new_event_loop()
+        self._pending = defaultdict(list)
+        self._flush_handle = None
+        self._in_flight = set()
+        self._channel_layer = None
+        self._thread = threading.Thread(target=self._run, name='group-publisher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def publish(self, group, event):
+        """Queue an event for a channel-layer group. Safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._enqueue, group, event)
+
+    def flush(self, timeout=5.0):
+        """Block until every event published so far has been sent"""
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result(timeout)
+
+    # The methods below run on the publisher's event loop
+
+    def _enqueue(self, group, event):
+        self._pending[group].append(event)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.coalesce_window, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, defaultdict(list)
+        task = self._loop.create_task(self._send(pending))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, pending):
+        if self._channel_layer is None:
+            self._channel_layer = get_channel_layer()
+
+        results = await asyncio.gather(
+            *(
+                self._channel_layer.group_send(
+                    group,
+                    events[0] if len(events) == 1 else {'type': 'event_batch', 'events': events}
+                )
+                for group, events in pending.items()
+            ),
+            return_exceptions=True,
+        )
+        for group, result in zip(pending, results):
+            if isinstance(result, Exception):
+                print(f"Error publishing to {group}: {result}")
+
+    async def _drain(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._start_flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+
+_publisher = None
+_publisher_pid = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """Return this process's publisher, creating a fresh one after fork"""
+    global _publisher, _publisher_pid
+    pid = os.getpid()
+    if _publisher_pid != pid:
+        with _publisher_lock:
+            if _publisher_pid != pid:
+                _publisher = GroupPublisher()
+                _publisher_pid = pid
+    return _publisher
+
+
+def publish(group, event):
+    """Send an event to a channel-layer group without blocking the caller"""
+    get_publisher().publish(group, event)
+
+
+def flush(timeout=5.0):
+    """Wait for this process's pending events to be sent, if any were published"""
+    if _publisher is not None and _publisher_pid == os.getpid():
+        _publisher.flush(timeout)
@@ -0,0 +1,94 @@
+"""
+Compact msgpack serialization for Celery tasks and channel-layer messages.
+
+numpy arrays are packed as a msgpack extension type carrying the raw array
+bytes (dtype, shape, data), so embeddings cross the wire as float32 instead of
+being expanded into lists of Python floats and re-encoded as text.
+"""
+import msgpack
+import numpy as np
+
+CONTENT_TYPE = 'application/x-msgpack-numpy'
+SERIALIZER_NAME = 'msgpack_numpy'
+
+NDARRAY_EXT_TYPE = 42
+
+# Embeddings are matched at far below float32 precision, so wider float
+# arrays are narrowed before they are sent
+_NARROWED_DTYPES = {np.dtype('float64'): np.dtype('float32')}
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        array = obj.astype(_NARROWED_DTYPES.get(obj.dtype, obj.dtype), copy=False)
+        array = np.ascontiguousarray(array)
+        header = msgpack.packb((array.dtype.str, array.shape))
+        return msgpack.ExtType(NDARRAY_EXT_TYPE, header + array.tobytes())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Cannot serialize object of type {type(obj).__name__}')
+
+
+def _ext_hook(code, data):
+    if code == NDARRAY_EXT_TYPE:
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(data)
+        dtype, shape = unpacker.unpack()
+        offset = unpacker.tell()
+        return np.frombuffer(data, dtype=np.dtype(dtype), offset=offset).reshape(shape)
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj):
+    """Serialize obj to msgpack bytes, packing numpy arrays as raw buffers"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def loads(data):
+    """Deserialize msgpack bytes produced by dumps()"""
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def to_jsonable(obj):
+    """Convert numpy values in a decoded message to plain JSON types"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, dict):
+        return {key: to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(value) for value in obj]
+    return obj
+
+
+def register_kombu_serializer():
+    """Register the serializer with kombu so Celery can use it by name"""
+    from kombu.serialization import register
+
+    register(
+        SERIALIZER_NAME,
+        dumps,
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding='binary',
+    )
+
+
+try:
+    from channels_redis.serializers import BaseMessageSerializer, registry
+except ImportError:
+    pass
+else:
+    class ChannelsMsgpackNumpySerializer(BaseMessageSerializer):
+        """channels-redis message serializer that understands numpy arrays"""
+
+        def as_bytes(self, message, *args, **kwargs):
+            return dumps(message)
+
+        def from_bytes(self, message, *args, **kwargs):
+            return loads(message)
+
+    registry.register_serializer(SERIALIZER_NAME, ChannelsMsgpackNumpySerializer)
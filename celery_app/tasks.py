@@ -1,112 +1,327 @@
 """
 Celery tasks for background processing of AI pipeline.
 """
-import base64
-import io
+from collections import defaultdict
+import numpy as np
 from celery import shared_task
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from ai_pipeline.video_processor import extract_faces_from_frame
-from ai_pipeline.face_recognition import match_face, create_face_signature
-from ai_pipeline.audio_processor import transcribe_audio
+from celery_batches import Batches
+from django.conf import settings
+from .blob_store import open_blob, delete_blob, get_blob_store, put_blob
+from .frame_lag import FrameLagTracker, redis_time
+from .publisher import publish
+from ai_pipeline.video_processor import extract_faces_from_frame, extract_faces_from_frames, load_frame
+from ai_pipeline.face_recognition import match_faces, create_face_signature
+from ai_pipeline.face_clustering import assign_unknown_faces
+from ai_pipeline.audio_processor import transcribe_segments
+from ai_pipeline.diarization import assign_speakers, diarize_chunk, append_transcript, get_call_transcript, format_transcript
+from ai_pipeline.voice_embedding import decode_audio, encode_wav
+from ai_pipeline.webm_stream import CallAudioStreams
 from ai_pipeline.note_extractor import extract_notes_from_transcription
+from ai_pipeline import signature_compaction
 
+# Queue lag of the frames this process picks up, per call
+_frame_lag = FrameLagTracker(settings.VIDEO_LAG_REPORT_BUCKET_MS / 1000, settings.VIDEO_LAG_REPORT_EVERY)
 
-@shared_task
-def process_video_chunk(user_id, video_data, timestamp):
+
+@shared_task(ignore_result=True, soft_time_limit=10, time_limit=15)
+def process_video_chunk(user_id, frame_ref, timestamp, enqueued_at=None):
     """
     Process video chunk to identify participants via face recognition.
+    Frames that waited in the queue longer than VIDEO_FRAME_MAX_AGE_SECONDS
+    are dropped, since their results would arrive too late to be useful.
 
     Args:
         user_id: ID of the user making the call
-        video_data: Base64 encoded video frame
+        frame_ref: Blob store reference to the encoded video frame
         timestamp: Timestamp of the video chunk
+        enqueued_at: Redis time (frame_lag.redis_time) at which the frame was queued
     """
     try:
-        # Decode base64 video frame
-        image_bytes = base64.b64decode(video_data)
+        # Report the lag so the consumer can adapt the client's frame rate
+        queue_lag = report_frame_lag(user_id, enqueued_at, redis_time(), timestamp)
+
+        if queue_lag > settings.VIDEO_FRAME_MAX_AGE_SECONDS:
+            return {'status': 'dropped', 'lag': queue_lag}
 
-        # Extract faces from frame
-        faces = extract_faces_from_frame(image_bytes)
+        # Extract faces from frame (read straight from the blob store)
+        with open_blob(frame_ref) as frame:
+            faces = extract_faces_from_frame(frame)
 
         # Match each face against existing signatures
-        for face in faces:
-            relationship = match_face(user_id, face['embedding'])
+        relationships = match_faces(user_id, [face['embedding'] for face in faces])
+        send_face_results(user_id, [(face, timestamp) for face in faces], relationships)
 
-            if relationship:
-                # Get recent notes for this relationship
-                from apps.notes.models import Note
-                recent_notes = Note.objects.filter(
-                    relationship=relationship,
-                    status='ACTIVE'
-                ).order_by('-importance_score', '-created_at')[:5]
-
-                # Send identification to WebSocket
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'call_{user_id}',
-                    {
-                        'type': 'participant_identified',
-                        'participant': {
-                            'id': relationship.id,
-                            'name': relationship.name,
-                            'relationship_type': relationship.relationship_type,
-                        },
-                        'notes': [
-                            {
-                                'id': note.id,
-                                'text': note.note_text,
-                                'importance': note.importance_score,
-                                'created_at': note.created_at.isoformat(),
-                            }
-                            for note in recent_notes
-                        ]
-                    }
-                )
-            else:
-                # New participant detected - will need to create profile later
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'call_{user_id}',
-                    {
-                        'type': 'new_participant',
-                        'participant': {
-                            'face_embedding': face['embedding'].tolist(),
-                            'timestamp': timestamp,
+        return {'status': 'success', 'faces_found': len(faces)}
+
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+    finally:
+        delete_blob(frame_ref)
+
+
+@shared_task(
+    base=Batches,
+    flush_every=settings.VIDEO_BATCH_SIZE,
+    flush_interval=settings.VIDEO_BATCH_WINDOW_MS / 1000,
+    ignore_result=True,
+    soft_time_limit=30,
+    time_limit=45,
+)
+def process_video_batch(requests):
+    """
+    Process frames from many calls in one pass.
+    Celery buffers process_video_batch messages until VIDEO_BATCH_SIZE frames
+    arrive or VIDEO_BATCH_WINDOW_MS elapses, then calls this with all of them.
+    Faces are detected across the batch, matched per user with one vectorised
+    scoring pass, and results are fanned back out to each call group.
+
+    Args:
+        requests: List of celery_batches.SimpleRequest, each with the
+            process_video_chunk keyword arguments
+    """
+    now = redis_time()
+    frames = []
+    try:
+        for request in requests:
+            frame = request.kwargs
+            queue_lag = report_frame_lag(frame['user_id'], frame.get('enqueued_at'), now, frame['timestamp'])
+
+            if queue_lag > settings.VIDEO_FRAME_MAX_AGE_SECONDS:
+                delete_blob(frame['frame_ref'])
+                continue
+            frames.append(frame)
+
+        # Decode every frame, then detect and encode faces across the batch
+        decoded = []
+        for frame in frames:
+            try:
+                with open_blob(frame['frame_ref']) as blob:
+                    decoded.append((frame, load_frame(blob)))
+            except Exception as e:
+                print(f"Error decoding frame: {e}")
+        faces_per_frame = extract_faces_from_frames([image for _, image in decoded])
+
+        # Group faces by user so each user's signatures are scored once
+        faces_by_user = defaultdict(list)
+        for (frame, _), faces in zip(decoded, faces_per_frame):
+            for face in faces:
+                faces_by_user[frame['user_id']].append((face, frame['timestamp']))
+
+        for user_id, user_faces in faces_by_user.items():
+            relationships = match_faces(user_id, np.stack([face['embedding'] for face, _ in user_faces]))
+            send_face_results(user_id, user_faces, relationships)
+
+        return {'status': 'success', 'frames': len(frames)}
+
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+    finally:
+        for frame in frames:
+            delete_blob(frame['frame_ref'])
+
+
+def report_frame_lag(user_id, enqueued_at, dequeued_at, timestamp):
+    """
+    Measure how long a frame waited in the queue, and tell the call's consumer
+    when the lag has moved (see frame_lag).
+
+    Returns:
+        The frame's queue lag in seconds
+    """
+    if not enqueued_at:
+        return 0.0
+
+    queue_lag = max(dequeued_at - enqueued_at, 0.0)
+    if _frame_lag.observe(user_id, queue_lag):
+        publish(
+            f'call_{user_id}',
+            {
+                'type': 'frame_processed',
+                'lag': queue_lag,
+                'timestamp': timestamp,
+            }
+        )
+    return queue_lag
+
+
+def send_face_results(user_id, faces, relationships):
+    """
+    Send identification results for one user's faces to their call group.
+    Each identified relationship is announced once, with its recent notes.
+    Unmatched faces are clustered per call, and only the first sighting of
+    each unknown person is sent as a new participant.
+
+    Args:
+        user_id: ID of the user making the call
+        faces: List of (face dict, frame timestamp) tuples
+        relationships: Matched Relationship (or None) for each face
+    """
+    from apps.notes.models import Note
+
+    announced = set()
+    unknown = []
+
+    for (face, timestamp), relationship in zip(faces, relationships):
+        if relationship:
+            if relationship.id in announced:
+                continue
+            announced.add(relationship.id)
+
+            # Get recent notes for this relationship
+            recent_notes = Note.objects.filter(
+                relationship=relationship,
+                status='ACTIVE'
+            ).order_by('-importance_score', '-created_at')[:5]
+
+            # Send identification to WebSocket
+            publish(
+                f'call_{user_id}',
+                {
+                    'type': 'participant_identified',
+                    'participant': {
+                        'id': relationship.id,
+                        'name': relationship.name,
+                        'relationship_type': relationship.relationship_type,
+                    },
+                    'notes': [
+                        {
+                            'id': note.id,
+                            'text': note.note_text,
+                            'importance': note.importance_score,
+                            'created_at': note.created_at.isoformat(),
                         }
-                    }
-                )
+                        for note in recent_notes
+                    ]
+                }
+            )
+        else:
+            unknown.append((face, timestamp))
 
-        return {'status': 'success', 'faces_found': len(faces)}
+    # New participants - the user can name them later to create a profile
+    # The embeddings stay in the server-side pending-face cache; the client
+    # only gets the short id it enrolls the person with
+    assignments = assign_unknown_faces(user_id, unknown)
+    for (face, timestamp), (participant_id, created) in zip(unknown, assignments):
+        if not created:
+            continue
+        publish(
+            f'call_{user_id}',
+            {
+                'type': 'new_participant',
+                'participant': {
+                    'participant_id': participant_id,
+                    'location': [int(value) for value in face['location']],
+                    'timestamp': timestamp,
+                }
+            }
+        )
+
+
+# MediaRecorder streams being decoded by this process, one per call
+_call_audio = CallAudioStreams(settings.AUDIO_SEGMENT_SECONDS, settings.CALL_STATE_TTL_SECONDS)
+
+
+def queue_audio_segment(user_id, pcm, timestamp):
+    """Store a decoded segment as WAV and queue it for transcription"""
+    process_audio_chunk.delay(
+        user_id=user_id,
+        audio_ref=put_blob(encode_wav(pcm)),
+        timestamp=timestamp
+    )
+
+
+@shared_task(ignore_result=True, soft_time_limit=10, time_limit=15)
+def decode_call_audio(user_id, audio_ref, timestamp):
+    """
+    Decode the next MediaRecorder chunk of a call.
+    The chunk is fed to the call's WebM/Opus stream in this process, and every
+    segment of about AUDIO_SEGMENT_SECONDS it completes is queued for
+    transcription.
+
+    Args:
+        user_id: ID of the user making the call
+        audio_ref: Blob store reference to the raw WebM chunk
+        timestamp: Timestamp of the audio chunk
+    """
+    try:
+        with open_blob(audio_ref) as audio:
+            chunk = audio.read()
+        segments = _call_audio.feed(user_id, chunk, timestamp)
+        for pcm, segment_timestamp in segments:
+            queue_audio_segment(user_id, pcm, segment_timestamp)
+        return {'status': 'success', 'segments': len(segments)}
+
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+    finally:
+        delete_blob(audio_ref)
+
+
+@shared_task(ignore_result=True, soft_time_limit=10, time_limit=15)
+def end_call_audio(user_id, timestamp=None):
+    """
+    Close a call's MediaRecorder stream and queue the audio still buffered,
+    including what the decoder and resampler held back.
+
+    Args:
+        user_id: ID of the user making the call
+        timestamp: Timestamp of the call end, for audio not yet in a segment
+    """
+    try:
+        segment = _call_audio.close(user_id, timestamp)
+        if segment is not None:
+            queue_audio_segment(user_id, *segment)
+        return {'status': 'success'}
 
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 
-@shared_task
-def process_audio_chunk(user_id, audio_data, timestamp):
+@shared_task(ignore_result=True, soft_time_limit=60, time_limit=90)
+def process_audio_chunk(user_id, audio_ref, timestamp):
     """
     Process audio chunk for transcription.
+    The chunk is transcribed into timed segments and diarized against the
+    call's speakers, and the attributed segments are added to the call
+    transcript used for note extraction.
 
     Args:
         user_id: ID of the user making the call
-        audio_data: Base64 encoded audio data
+        audio_ref: Blob store reference to the audio data
         timestamp: Timestamp of the audio chunk
     """
     try:
-        # Decode base64 audio
-        audio_bytes = base64.b64decode(audio_data)
+        # Decode once for both transcription and diarization
+        with open_blob(audio_ref) as audio:
+            pcm = decode_audio(audio)
+
+        segments = assign_speakers(transcribe_segments(pcm), diarize_chunk(user_id, pcm))
+        for segment in segments:
+            segment['timestamp'] = timestamp
+        append_transcript(user_id, segments)
 
-        # Transcribe audio
-        transcription = transcribe_audio(audio_bytes)
+        transcription = ' '.join(segment['text'].strip() for segment in segments)
 
         # Send transcription to WebSocket (optional, for real-time display)
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
+        publish(
             f'call_{user_id}',
             {
                 'type': 'transcription_update',
                 'transcription': transcription,
+                'segments': [
+                    {
+                        'speaker': segment['speaker'],
+                        'relationship_id': segment['relationship_id'],
+                        'name': segment['name'],
+                        'start': segment['start'],
+                        'end': segment['end'],
+                        'text': segment['text'],
+                    }
+                    for segment in segments
+                ],
                 'timestamp': timestamp,
             }
         )
@@ -116,8 +331,11 @@ def process_audio_chunk(user_id, audio_data, timestamp):
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
+    finally:
+        delete_blob(audio_ref)
+
 
-@shared_task
+@shared_task(ignore_result=True, soft_time_limit=300, time_limit=360)
 def finalize_call_processing(user_id, interaction_id):
     """
     Finalize call processing after call ends.
@@ -133,6 +351,16 @@ def finalize_call_processing(user_id, interaction_id):
 
         interaction = Interaction.objects.get(id=interaction_id, user_id=user_id)
 
+        # Use the transcript attributed during the call, if none was stored
+        if not interaction.transcription:
+            segments = get_call_transcript(user_id)
+            interaction.transcription = format_transcript(segments)
+            interaction.save(update_fields=['transcription'])
+
+            speaker_ids = {segment['relationship_id'] for segment in segments if segment.get('relationship_id')}
+            if speaker_ids:
+                interaction.relationships.add(*speaker_ids)
+
         # Extract notes from transcription
         notes_data = extract_notes_from_transcription(
             interaction.transcription,
@@ -153,8 +381,7 @@ def finalize_call_processing(user_id, interaction_id):
             created_notes.append(note)
 
             # Send note to WebSocket
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
+            publish(
                 f'call_{user_id}',
                 {
                     'type': 'note_generated',
@@ -173,7 +400,7 @@ def finalize_call_processing(user_id, interaction_id):
         return {'status': 'error', 'message': str(e)}
 
 
-@shared_task
+@shared_task(soft_time_limit=5, time_limit=10)
 def identify_participants(user_id, face_embeddings):
     """
     Identify call participants from face embeddings.
@@ -183,8 +410,7 @@ def identify_participants(user_id, face_embeddings):
         from apps.relationships.models import Relationship
 
         identified = []
-        for embedding in face_embeddings:
-            relationship = match_face(user_id, embedding)
+        for relationship in match_faces(user_id, face_embeddings):
             if relationship:
                 identified.append({
                     'id': relationship.id,
@@ -196,3 +422,26 @@ def identify_participants(user_id, face_embeddings):
 
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
+
+
+@shared_task(ignore_result=True)
+def purge_expired_blobs():
+    """
+    Remove media blobs that were never consumed (e.g. the task was lost).
+    Scheduled periodically by Celery beat.
+    """
+    return {'status': 'success', 'purged': get_blob_store().purge_expired()}
+
+
+@shared_task(ignore_result=True, soft_time_limit=600, time_limit=660)
+def compact_signatures():
+    """
+    Cap the number of face and voice signatures per relationship.
+    Scheduled periodically by Celery beat.
+    """
+    try:
+        deleted = signature_compaction.compact_signatures()
+        return {'status': 'success', 'deleted': deleted}
+
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third-party
     'rest_framework',
@@ -121,6 +122,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.common.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
 }
@@ -136,23 +141,133 @@ CORS_ALLOW_CREDENTIALS = True
 # Allow all origins for WebSocket (Chrome extension)
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+# Redis
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Django cache: 'redis' (shared by all web processes) or 'locmem' (tests)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', REDIS_URL),
+    } if CACHE_BACKEND == 'redis' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Cached API responses are keyed by the user's data version; entries for
+# superseded versions are left to expire after this long
+API_CACHE_TTL_SECONDS = int(os.getenv('API_CACHE_TTL_SECONDS', '300'))
+
 # Channels / WebSocket
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            'hosts': [os.getenv('REDIS_URL', 'redis://localhost:6379/0')],
+            'hosts': [REDIS_URL],
+            # msgpack with numpy arrays packed as raw float32 bytes
+            # (registered in celery_app.serialization)
+            'serializer_format': 'msgpack_numpy',
         },
     },
 }
 
+# Claim-check blob store for media payloads passed to Celery tasks
+# 'local' needs a directory shared by web and workers (use /dev/shm on a single host)
+# 'redis' stores blobs in Redis with a TTL
+BLOB_STORE_BACKEND = os.getenv('BLOB_STORE_BACKEND', 'local')
+BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', str(MEDIA_ROOT / 'blobs'))
+BLOB_STORE_TTL_SECONDS = int(os.getenv('BLOB_STORE_TTL_SECONDS', '300'))
+
+# Video load shedding: frames older than this at dequeue are dropped, and the
+# extension is asked to slow down while queue lag stays above the target
+VIDEO_FRAME_MAX_AGE_SECONDS = float(os.getenv('VIDEO_FRAME_MAX_AGE_SECONDS', '5'))
+VIDEO_TARGET_QUEUE_LAG_SECONDS = float(os.getenv('VIDEO_TARGET_QUEUE_LAG_SECONDS', '1'))
+VIDEO_MIN_FRAME_INTERVAL_MS = int(os.getenv('VIDEO_MIN_FRAME_INTERVAL_MS', '500'))
+VIDEO_MAX_FRAME_INTERVAL_MS = int(os.getenv('VIDEO_MAX_FRAME_INTERVAL_MS', '10000'))
+# Workers report a call's lag when it crosses a bucket, or every N frames
+VIDEO_LAG_REPORT_BUCKET_MS = int(os.getenv('VIDEO_LAG_REPORT_BUCKET_MS', '250'))
+VIDEO_LAG_REPORT_EVERY = int(os.getenv('VIDEO_LAG_REPORT_EVERY', '10'))
+
+# Micro-batching: frames from all calls are processed together once
+# VIDEO_BATCH_SIZE frames arrive or VIDEO_BATCH_WINDOW_MS elapses
+VIDEO_BATCHING_ENABLED = os.getenv('VIDEO_BATCHING_ENABLED', 'true').lower() == 'true'
+VIDEO_BATCH_SIZE = int(os.getenv('VIDEO_BATCH_SIZE', '16'))
+VIDEO_BATCH_WINDOW_MS = int(os.getenv('VIDEO_BATCH_WINDOW_MS', '50'))
+
+# Per-user signature matrices cached in Redis for vectorised matching
+SIGNATURE_CACHE_TTL_SECONDS = int(os.getenv('SIGNATURE_CACHE_TTL_SECONDS', '3600'))
+
+# In-memory form of cached signature matrices: float32, float16 or int8
+SIGNATURE_MATCH_PRECISION = os.getenv('SIGNATURE_MATCH_PRECISION', 'float16')
+
+# Memory-mapped signature files shared by worker processes on a node
+# (a tmpfs such as /dev/shm works well); set to an empty string to disable
+SIGNATURE_STORE_DIR = os.getenv('SIGNATURE_STORE_DIR', str(MEDIA_ROOT / 'signature_store'))
+
+# Provisional participants (clustered unknown faces) kept per call
+FACE_CLUSTER_TTL_SECONDS = int(os.getenv('FACE_CLUSTER_TTL_SECONDS', '7200'))
+
+# Speaker clusters and the attributed transcript kept per call
+CALL_STATE_TTL_SECONDS = int(os.getenv('CALL_STATE_TTL_SECONDS', '7200'))
+
+# Decoded call audio is transcribed in segments of about this length
+AUDIO_SEGMENT_SECONDS = float(os.getenv('AUDIO_SEGMENT_SECONDS', '5'))
+
+# Face/voice signatures kept per relationship by the compact_signatures job
+SIGNATURE_MAX_PER_RELATIONSHIP = int(os.getenv('SIGNATURE_MAX_PER_RELATIONSHIP', '8'))
+
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['msgpack_numpy', 'json']
+CELERY_TASK_SERIALIZER = os.getenv('CELERY_TASK_SERIALIZER', 'msgpack_numpy')
+CELERY_RESULT_SERIALIZER = os.getenv('CELERY_RESULT_SERIALIZER', 'msgpack_numpy')
+# Per-queue serializer overrides, e.g. CELERY_JSON_QUEUES=llm keeps JSON on that queue
+CELERY_QUEUE_SERIALIZERS = {
+    queue: 'json' for queue in os.getenv('CELERY_JSON_QUEUES', '').split(',') if queue
+}
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_IMPORTS = ('celery_app.tasks',)
+
+# Dedicated queues so a backlog of LLM jobs never delays face identification.
+# With the Redis transport, priority 0 is consumed first.
+CELERY_TASK_ROUTES = {
+    'celery_app.tasks.identify_participants': {'queue': 'identify', 'priority': 0},
+    'celery_app.tasks.process_video_chunk': {'queue': 'video', 'priority': 3},
+    'celery_app.tasks.process_video_batch': {'queue': 'video', 'priority': 3},
+    # One process decodes each call's MediaRecorder stream in order
+    'celery_app.tasks.decode_call_audio': {'queue': 'audio_decode', 'priority': 3},
+    'celery_app.tasks.end_call_audio': {'queue': 'audio_decode', 'priority': 3},
+    'celery_app.tasks.process_audio_chunk': {'queue': 'audio', 'priority': 3},
+    'celery_app.tasks.finalize_call_processing': {'queue': 'llm', 'priority': 6},
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    # Must exceed the longest hard time limit, or late-acked tasks get redelivered
+    'visibility_timeout': 3600,
+}
+# Fetch one task at a time so a long task never holds others hostage
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-blobs': {
+        'task': 'celery_app.tasks.purge_expired_blobs',
+        'schedule': 60.0,
+    },
+    'compact-signatures': {
+        'task': 'celery_app.tasks.compact_signatures',
+        'schedule': 3600.0,
+    },
+}
+
+# Voice embedding backend (dotted path to a VoiceEmbeddingBackend subclass)
+# and, for the MFCC backend, an optional .npz of background statistics
+VOICE_EMBEDDING_BACKEND = os.getenv('VOICE_EMBEDDING_BACKEND', 'ai_pipeline.voice_embedding.MFCCStatsBackend')
+VOICE_EMBEDDING_BACKGROUND = os.getenv('VOICE_EMBEDDING_BACKGROUND', '')
 
 # AI Model Configuration
 USE_OPENAI_APIS = os.getenv('USE_OPENAI_APIS', 'false').lower() == 'true'
@@ -1,9 +1,21 @@
 import json
 import base64
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from celery_app.tasks import process_video_chunk, identify_participants
+from celery_app.blob_store import put_blob
+from celery_app.frame_lag import redis_time
+from celery_app.serialization import to_jsonable
+from ai_pipeline.diarization import reset_call_speakers
+from ai_pipeline.face_clustering import reset_call_clusters
+from ai_pipeline.webm_stream import is_webm
+from celery_app.tasks import (
+    process_video_chunk, process_video_batch, process_audio_chunk, decode_call_audio, end_call_audio,
+    identify_participants,
+)
+from .throttle import FrameRateController
 
 User = get_user_model()
 
@@ -18,6 +30,13 @@ class CallConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.room_group_name = f'call_{self.user_id}'
+        self.frame_rate = FrameRateController(
+            target_lag=settings.VIDEO_TARGET_QUEUE_LAG_SECONDS,
+            min_interval_ms=settings.VIDEO_MIN_FRAME_INTERVAL_MS,
+            max_interval_ms=settings.VIDEO_MAX_FRAME_INTERVAL_MS,
+        )
+        # MediaRecorder audio is one WebM stream across chunks, decoded by the audio_decode worker
+        self.audio_is_webm = False
 
         # Join room group
         await self.channel_layer.group_add(
@@ -77,6 +96,11 @@ class CallConsumer(AsyncWebsocketConsumer):
 
     async def handle_call_start(self, data):
         """Handle call start event"""
+        # Unknown faces and speakers from a previous call are not this call's participants
+        await sync_to_async(reset_call_clusters)(self.user_id)
+        await sync_to_async(reset_call_speakers)(self.user_id)
+        self.audio_is_webm = False
+
         await self.send(text_data=json.dumps({
             'type': 'call_started',
             'message': 'Call processing started'
@@ -87,12 +111,15 @@ class CallConsumer(AsyncWebsocketConsumer):
         video_data = data.get('video_data')  # base64 encoded video frame
         timestamp = data.get('timestamp')
 
-        # Queue async task to process video chunk
-        # This will be handled by Celery
-        process_video_chunk.delay(
+        # Store the frame once and queue only its reference, so the image
+        # never travels through the Celery broker
+        frame_ref = await sync_to_async(put_blob)(base64.b64decode(video_data))
+        video_task = process_video_batch if settings.VIDEO_BATCHING_ENABLED else process_video_chunk
+        video_task.delay(
             user_id=self.user_id,
-            video_data=video_data,
-            timestamp=timestamp
+            frame_ref=frame_ref,
+            timestamp=timestamp,
+            enqueued_at=await sync_to_async(redis_time)()
         )
 
         # Send acknowledgment
@@ -106,9 +133,22 @@ class CallConsumer(AsyncWebsocketConsumer):
         """Process audio chunk for transcription"""
         audio_data = data.get('audio_data')  # base64 encoded audio
         timestamp = data.get('timestamp')
-
-        # Queue async task for audio processing
-        # Will be implemented in Celery tasks
+        chunk = base64.b64decode(audio_data)
+
+        # A chunk starting with the EBML header opens a new MediaRecorder stream;
+        # the chunks after it cannot be decoded on their own
+        if is_webm(chunk):
+            self.audio_is_webm = True
+
+        # Store the chunk once and queue only its reference. Self-contained audio
+        # files (WAV, MP3, ...) go straight to transcription
+        audio_ref = await sync_to_async(put_blob)(chunk)
+        audio_task = decode_call_audio if self.audio_is_webm else process_audio_chunk
+        audio_task.delay(
+            user_id=self.user_id,
+            audio_ref=audio_ref,
+            timestamp=timestamp
+        )
 
         await self.send(text_data=json.dumps({
             'type': 'chunk_received',
@@ -118,12 +158,22 @@ class CallConsumer(AsyncWebsocketConsumer):
 
     async def handle_call_end(self, data):
         """Handle call end event"""
+        # Transcribe the audio still buffered for the last segment
+        if self.audio_is_webm:
+            end_call_audio.delay(user_id=self.user_id, timestamp=data.get('timestamp'))
+            self.audio_is_webm = False
+
         await self.send(text_data=json.dumps({
             'type': 'call_ended',
             'message': 'Call processing completed'
         }))
 
     # Handler for messages sent from Celery tasks
+    async def event_batch(self, event):
+        """Unpack events coalesced by the worker publisher, in order"""
+        for item in event['events']:
+            await self.dispatch(item)
+
     async def participant_identified(self, event):
         """Send participant identification to WebSocket client"""
         await self.send(text_data=json.dumps({
@@ -136,7 +186,16 @@ class CallConsumer(AsyncWebsocketConsumer):
         """Send new participant notification to WebSocket client"""
         await self.send(text_data=json.dumps({
             'type': 'new_participant',
-            'participant': event['participant']
+            'participant': to_jsonable(event['participant'])
+        }))
+
+    async def transcription_update(self, event):
+        """Send attributed transcript segments to WebSocket client"""
+        await self.send(text_data=json.dumps({
+            'type': 'transcription_update',
+            'transcription': event['transcription'],
+            'segments': to_jsonable(event.get('segments', [])),
+            'timestamp': event.get('timestamp'),
         }))
 
     async def note_generated(self, event):
@@ -145,3 +204,13 @@ class CallConsumer(AsyncWebsocketConsumer):
             'type': 'note_generated',
             'note': event['note']
         }))
+
+    async def frame_processed(self, event):
+        """Track worker queue lag and ask the client to throttle if needed"""
+        interval_ms = self.frame_rate.observe(event['lag'])
+        if interval_ms is not None:
+            await self.send(text_data=json.dumps({
+                'type': 'throttle',
+                'frame_interval_ms': interval_ms,
+                'queue_lag_ms': int(self.frame_rate.lag * 1000),
+            }))
@@ -0,0 +1,54 @@
+import time
+
+
+class FrameRateController:
+    """
+    Recommends how often the extension should send video frames, based on the
+    queue lag reported by the workers for each processed frame.
+
+    Backs off multiplicatively when the smoothed lag exceeds the target and
+    recovers gradually once the backlog has drained, adjusting at most once
+    per cooldown period so a burst of reports is not over-counted.
+    """
+
+    def __init__(self, target_lag, min_interval_ms, max_interval_ms,
+                 smoothing=0.3, cooldown=2.0):
+        self.target_lag = target_lag
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self.interval_ms = min_interval_ms
+        self.lag = None
+        self._last_adjusted = 0.0
+
+    def observe(self, lag):
+        """
+        Record the lag of one frame (seconds between enqueue and dequeue).
+
+        Returns:
+            The new recommended interval in ms if it changed, None otherwise
+        """
+        if self.lag is None:
+            self.lag = lag
+        else:
+            self.lag = self.smoothing * lag + (1 - self.smoothing) * self.lag
+
+        now = time.monotonic()
+        if now - self._last_adjusted < self.cooldown:
+            return None
+
+        if self.lag > self.target_lag:
+            interval = min(self.max_interval_ms, self.interval_ms * 2)
+        elif self.lag < self.target_lag / 2:
+            interval = max(self.min_interval_ms, self.interval_ms * 0.8)
+        else:
+            return None
+
+        # Ignore changes too small for the client to act on
+        if abs(interval - self.interval_ms) < self.interval_ms * 0.1:
+            return None
+
+        self.interval_ms = int(interval)
+        self._last_adjusted = now
+        return self.interval_ms